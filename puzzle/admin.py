@@ -30,15 +30,10 @@ class WordFinderAdmin(admin.ModelAdmin):
     readonly_fields = ('board', 'image')
 
 
-class WordTokenInline(admin.TabularInline):
-    model = models.WordToken
-
-
 class WordAdmin(admin.ModelAdmin):
     change_list_template = 'admin/word_change_list.html'
     list_filter = ('size',)
     readonly_fields = ('word',)
-    inlines = (WordTokenInline,)
     search_fields = ('word',)
 
 
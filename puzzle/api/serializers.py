@@ -1,3 +1,4 @@
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
 from rest_framework.serializers import ModelSerializer, SerializerMethodField
 
 from puzzle.models import Puzzle
@@ -13,5 +14,8 @@ class PuzzleSerializer(ModelSerializer):
 
     @staticmethod
     def get_puzzle_data(obj):
-        puzzle = Puzzle.objects.get_narrow(obj.pk)
-        return puzzle.get_puzzle_data()
+        return obj.narrow().get_puzzle_data()
+
+
+def render_payload(puzzle: Puzzle) -> str:
+    return CamelCaseJSONRenderer().render(PuzzleSerializer(puzzle).data).decode()
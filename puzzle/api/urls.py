@@ -1,6 +1,6 @@
 from django.urls import path
 
-from puzzle.api.views import PuzzleView
+from puzzle.api.views import PuzzleImageView, PuzzleView
 
 
 app_name = 'api'
@@ -8,4 +8,5 @@ app_name = 'api'
 
 urlpatterns = [
     path('puzzles/<str:puzzle_type>/', PuzzleView.as_view(), name='puzzle'),
+    path('images/<str:image_hash>.png', PuzzleImageView.as_view(), name='image'),
 ]
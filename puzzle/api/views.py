@@ -1,9 +1,17 @@
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.decorators import method_decorator
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.cache import cache_control
+from django.views.generic import View
 from djangorestframework_camel_case.render import CamelCaseJSONRenderer
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 
 from puzzle.api.serializers import PuzzleSerializer
 from puzzle.models import Puzzle
+from puzzle.selection import get_selection_strategy
 
 
 class PuzzleView(GenericAPIView):
@@ -13,11 +21,41 @@ class PuzzleView(GenericAPIView):
     serializer_class = PuzzleSerializer
 
     def get(self, request, puzzle_type, *args, **kwargs):
-        instance = self.get_queryset().first()
+        instance = get_selection_strategy().select(self.get_queryset(), puzzle_type)
         if not instance:
             return Response(status=404)
+        if instance.payload:
+            return HttpResponse(instance.payload, content_type='application/json')
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
     def get_queryset(self):
-        return Puzzle.objects.filter(puzzle_type=self.kwargs['puzzle_type']).order_by('?')
+        return Puzzle.objects.only('puzzle_type', 'payload')
+
+
+# Image URLs contain the content hash, so a response never goes stale
+IMAGE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+@method_decorator(cache_control(public=True, max_age=IMAGE_MAX_AGE, immutable=True), name='dispatch')
+class PuzzleImageView(View):
+
+    def get(self, request, image_hash, *args, **kwargs):
+        # The hash is the ETag, but only once it is known to be an image's
+        puzzle = Puzzle.objects.filter(image_hash=image_hash).only('image').first()
+        if not puzzle:
+            raise Http404()
+        etag = quote_etag(image_hash)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = self.get_image_response(puzzle)
+        response['ETag'] = etag
+        return response
+
+    def get_image_response(self, puzzle: Puzzle) -> HttpResponse:
+        if settings.PUZZLE_IMAGE_ACCEL_REDIRECT:
+            # Let the front server send the file
+            response = HttpResponse(content_type='image/png')
+            response['X-Accel-Redirect'] = settings.PUZZLE_IMAGE_ACCEL_REDIRECT + puzzle.image.name
+            return response
+        return FileResponse(puzzle.image.open('rb'), content_type='image/png')
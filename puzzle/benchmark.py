@@ -0,0 +1,299 @@
+import copy
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.core.management import CommandError
+from django.db import connection, connections, DEFAULT_DB_ALIAS
+from django.db.utils import load_backend
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from puzzle.common.index import clear_word_indexes
+from puzzle.common.utils import import_words
+
+
+# Rough English letter frequencies, so that synthetic words cross often
+# enough for squares and ladders to exist.
+LETTER_WEIGHTS = {
+    'A': 8.2, 'B': 1.5, 'C': 2.8, 'D': 4.3, 'E': 12.7, 'F': 2.2, 'G': 2.0, 'H': 6.1, 'I': 7.0,
+    'J': 0.2, 'K': 0.8, 'L': 4.0, 'M': 2.4, 'N': 6.7, 'O': 7.5, 'P': 1.9, 'Q': 0.1, 'R': 6.0,
+    'S': 6.3, 'T': 9.1, 'U': 2.8, 'V': 1.0, 'W': 2.4, 'X': 0.2, 'Y': 2.0, 'Z': 0.1,
+}
+
+WORD_SIZES = range(4, 11)
+
+# Only the renderers need these; setting up the app must not import them
+RENDERING_MODULES = ('PIL', 'matplotlib', 'seaborn')
+
+STARTUP_SCRIPT = '''
+import json, sys
+import django
+django.setup()
+print(json.dumps([name for name in {modules!r} if name in sys.modules]))
+'''
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    runs: int
+    successes: int
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+    cold_queries: int
+    queries_per_run: float
+    peak_memory_kb: float
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.runs if self.runs else 0.0
+
+    def as_dict(self) -> dict:
+        return dict(asdict(self), success_rate=self.success_rate)
+
+
+@dataclass
+class BenchmarkCase:
+    name: str
+    # Takes the generator to draw from and returns whether it succeeded
+    run: Callable[[random.Random], bool]
+
+
+def synthetic_words(rng: random.Random, words_per_size: int, sizes: Iterable[int] = WORD_SIZES) -> List[str]:
+    letters, weights = zip(*LETTER_WEIGHTS.items())
+    words = []
+    for size in sizes:
+        words.extend(''.join(rng.choices(letters, weights, k=size)) for _ in range(words_per_size))
+    return words
+
+
+def run_startup() -> List[str]:
+    """
+    Set up Django in a fresh interpreter and return the rendering modules
+    that were imported along the way.
+    """
+    # The settings module is passed on through DJANGO_SETTINGS_MODULE
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, sys.path)))
+    process = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT.format(modules=RENDERING_MODULES)],
+        env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(process.stdout)
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(case: BenchmarkCase, runs: int, seed: int) -> BenchmarkResult:
+    # The first run builds whatever the generator caches (word indexes,
+    # graphs), which is reported apart from the warm runs.
+    clear_word_indexes()
+    with CaptureQueriesContext(connection) as cold:
+        case.run(random.Random(seed))
+
+    timings = []
+    successes = 0
+    with CaptureQueriesContext(connection) as warm:
+        for run in range(runs):
+            rng = random.Random(seed + run)
+            start = time.perf_counter()
+            successes += bool(case.run(rng))
+            timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        case.run(random.Random(seed))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchmarkResult(
+        name=case.name,
+        runs=runs,
+        successes=successes,
+        p50_ms=round(statistics.median(timings), 3),
+        p90_ms=round(percentile(timings, 0.9), 3),
+        p99_ms=round(percentile(timings, 0.99), 3),
+        max_ms=round(max(timings), 3),
+        cold_queries=len(cold.captured_queries),
+        queries_per_run=len(warm.captured_queries) / runs,
+        peak_memory_kb=round(peak / 1024, 1),
+    )
+
+
+def check_budgets(results: List[BenchmarkResult], budgets: Dict[str, Dict[str, float]]) -> List[str]:
+    """
+    Return a message for every metric over its budget. A budget maps a
+    case name to metric maxima; success_rate is a minimum instead.
+    """
+    violations = []
+    by_name = {result.name: result.as_dict() for result in results}
+    for name, limits in budgets.items():
+        if name not in by_name:
+            continue
+        for metric, limit in limits.items():
+            value = by_name[name][metric]
+            if (value < limit) if metric == 'success_rate' else (value > limit):
+                violations.append(f'{name}: {metric} is {value}, budget {limit}')
+    return violations
+
+
+def get_cases(words: List[str], names: Optional[List[str]] = None) -> List[BenchmarkCase]:
+    from puzzle.knight_move.exceptions import NoMovesError
+    from puzzle.knight_move.fields import Board as KnightMoveBoard
+    from puzzle.knight_move.utils import generate_knight_move
+    from puzzle.models import KnightMove, PieSlice, WordFinder, WordLadder, WordSquare
+    from puzzle.pie_slice.utils import obfuscate_word
+    from puzzle.word_finder.exceptions import WordFinderCreateError
+    from puzzle.word_finder.fields import Board as WordFinderBoard
+    from puzzle.word_finder.models import CreateWordFinderRequest
+    from puzzle.word_finder.utils import generate_word_finder
+    from puzzle.word_ladder.exceptions import WordLadderCreateError
+    from puzzle.word_ladder.fields import Board as WordLadderBoard
+    from puzzle.word_ladder.utils import generate_word_ladder
+    from puzzle.word_square.exceptions import WordSquareCreateError
+    from puzzle.word_square.fields import Board as WordSquareBoard
+    from puzzle.word_square.utils import generate_word_square
+
+    by_size: Dict[int, List[str]] = {}
+    for word in words:
+        by_size.setdefault(len(word), []).append(word)
+
+    def words_of(size):
+        # Only looked up by the cases that run, so a dictionary need not
+        # have every length
+        if not by_size.get(size):
+            raise CommandError(f"The dictionary has no words of {size} letters")
+        return by_size[size]
+
+    def attempt(func, *errors):
+        def run(rng):
+            try:
+                func(rng)
+            except errors:
+                return False
+            return True
+        return run
+
+    def finder_request(rng):
+        pool = by_size.get(4, []) + by_size.get(5, [])
+        return CreateWordFinderRequest(words=rng.sample(pool, min(len(pool), 12)), size=6)
+
+    def sample_board(generate, *errors):
+        # A board to draw, from the first seed that yields one
+        for seed in range(100):
+            try:
+                return generate(random.Random(seed))
+            except errors:
+                continue
+        return None
+
+    def draw(draw_image, board):
+        return lambda rng: draw_image(board) is not None
+
+    def selected(name):
+        return not names or name in names
+
+    cases = [
+        # Includes starting the interpreter
+        BenchmarkCase('django_setup', lambda rng: not run_startup()),
+        BenchmarkCase('generate_knight_move', attempt(
+            lambda rng: generate_knight_move(rng.choice(words_of(8)), rng), NoMovesError
+        )),
+        BenchmarkCase('obfuscate_word', attempt(lambda rng: obfuscate_word(rng.choice(words_of(9)), rng))),
+        BenchmarkCase('generate_word_finder', attempt(
+            lambda rng: generate_word_finder(finder_request(rng), rng), WordFinderCreateError
+        )),
+        BenchmarkCase('generate_word_square', attempt(
+            lambda rng: generate_word_square(4, rng=rng), WordSquareCreateError
+        )),
+        BenchmarkCase('generate_word_ladder', attempt(
+            lambda rng: generate_word_ladder(4, rng=rng), WordLadderCreateError
+        )),
+    ]
+    # Sample boards are only generated for the draw cases that run
+    if selected('draw_pie_slice'):
+        cases.append(BenchmarkCase(
+            'draw_pie_slice', draw(PieSlice.draw_image, obfuscate_word(words_of(9)[0], random.Random(0)))
+        ))
+    if selected('draw_knight_move') and (knight_move := sample_board(
+        lambda rng: generate_knight_move(rng.choice(words_of(8)), rng), NoMovesError
+    )):
+        cases.append(BenchmarkCase(
+            'draw_knight_move', draw(KnightMove.draw_image, KnightMoveBoard.deserialize(knight_move))
+        ))
+    if selected('draw_word_finder') and (word_finder := sample_board(
+        lambda rng: generate_word_finder(finder_request(rng), rng), WordFinderCreateError
+    )):
+        cases.append(BenchmarkCase(
+            'draw_word_finder', draw(WordFinder(size=6).draw_image, WordFinderBoard.deserialize(word_finder.words))
+        ))
+    if selected('draw_word_square') and (word_square := sample_board(
+        lambda rng: generate_word_square(4, rng=rng), WordSquareCreateError
+    )):
+        cases.append(BenchmarkCase(
+            'draw_word_square', draw(WordSquare(size=4).draw_image, WordSquareBoard.deserialize(word_square))
+        ))
+    if selected('draw_word_ladder') and (word_ladder := sample_board(
+        lambda rng: generate_word_ladder(4, rng=rng), WordLadderCreateError
+    )):
+        cases.append(BenchmarkCase(
+            'draw_word_ladder', draw(WordLadder(width=4, height=len(word_ladder)).draw_image, WordLadderBoard.deserialize(word_ladder))
+        ))
+    return [case for case in cases if selected(case.name)]
+
+
+@contextmanager
+def benchmark_database() -> Iterator[None]:
+    """
+    Point the default connection at a fresh, migrated database for the
+    length of the block, created and dropped the way the test runner does.
+    The configured database is left alone, as is any connection already
+    open to it.
+    """
+    original = connections[DEFAULT_DB_ALIAS]
+    settings_dict = copy.deepcopy(original.settings_dict)
+    old_name = settings_dict['NAME']
+    with tempfile.TemporaryDirectory() as directory:
+        if original.vendor == 'sqlite':
+            settings_dict['TEST']['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+        else:
+            settings_dict['TEST']['NAME'] = f'{old_name}_benchmark'
+        database = load_backend(settings_dict['ENGINE']).DatabaseWrapper(settings_dict, DEFAULT_DB_ALIAS)
+        connections[DEFAULT_DB_ALIAS] = database
+        try:
+            database.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                yield
+            finally:
+                database.creation.destroy_test_db(old_name, verbosity=0)
+        finally:
+            connections[DEFAULT_DB_ALIAS] = original
+
+
+def run_benchmarks(words: List[str], runs: int, seed: int,
+                   names: Optional[List[str]] = None) -> List[BenchmarkResult]:
+    """
+    Load words as the dictionary of a database of its own and measure
+    every case (or the named ones).
+    """
+    with override_settings(PUZZLE_WORD_SNAPSHOT=''), benchmark_database():
+        try:
+            import_words(words)
+            results = [measure(case, runs, seed) for case in get_cases(words, names)]
+        finally:
+            clear_word_indexes()
+    return results
@@ -1,6 +1,63 @@
 import json
+import weakref
+from typing import List, Optional
 
 from django.db import models
+from django.db.models.query import ModelIterable
+from django.db.models.query_utils import DeferredAttribute
+
+from puzzle.common.utils import chunks
+
+
+# Primary keys per query when loading deferred boards, well below the
+# parameter limits of the database backends.
+PEER_BATCH_SIZE = 500
+
+JSON = 'json'
+
+COMPACT = 'compact'
+
+STORAGE_FORMATS = (JSON, COMPACT)
+
+# Compact letters that stand for something other than themselves
+_COMPACT_CODES = {' ': '_', None: '.'}
+
+_COMPACT_LETTERS = {code: letter for letter, code in _COMPACT_CODES.items()}
+
+
+def encode_compact(rows: List[List[Optional[str]]]) -> str:
+    """
+    Encode rows of letters as `<width>x<height>:` followed by the letters
+    row by row, one character each.
+    """
+    width = len(rows[0]) if rows else 0
+    letters = []
+    for row in rows:
+        if len(row) != width:
+            raise ValueError("Rows should have the same length")
+        for letter in row:
+            code = _COMPACT_CODES.get(letter, letter)
+            if len(code) != 1 or (code in _COMPACT_LETTERS and letter not in _COMPACT_CODES):
+                raise ValueError(f"Cannot encode letter {letter!r}")
+            letters.append(code)
+    return f'{width}x{len(rows)}:' + ''.join(letters)
+
+
+def decode_compact(value: str) -> List[List[Optional[str]]]:
+    header, _, letters = value.partition(':')
+    width, height = map(int, header.split('x'))
+    return [
+        [_COMPACT_LETTERS.get(code, code) for code in letters[(row * width):((row + 1) * width)]]
+        for row in range(height)
+    ]
+
+
+def get_storage_format(value: str) -> str:
+    return JSON if value.startswith('[') else COMPACT
+
+
+def decode_board(value: str) -> List[List[Optional[str]]]:
+    return json.loads(value) if get_storage_format(value) == JSON else decode_compact(value)
 
 
 class Board:
@@ -16,51 +73,130 @@ class Board:
         raise NotImplementedError()
 
 
-class BoardDescriptor:
+class LazyBoard(Board):
+    """
+    Board as loaded from the database, deserialized on first use.
 
-    def __init__(self, field):
-        self.field = field
+    Until then only the raw column value is kept, which BoardField writes
+    back unchanged.
+    """
 
-    def __get__(self, instance, owner):
-        if instance is None:
-            return self
+    def __init__(self, raw: str, field: 'BoardField'):
+        self._raw = raw
+        self._field = field
+        self._board = None
 
-        # The instance dict contains whatever was originally assigned in
-        # __set__.
-        if self.field.name in instance.__dict__:
-            value = instance.__dict__[self.field.name]
-        else:
-            instance.refresh_from_db(fields=[self.field.name])
-            value = getattr(instance, self.field.name)
-        return value
+    @property
+    def is_loaded(self) -> bool:
+        return self._board is not None
 
-    def __set__(self, instance, value):
-        instance.__dict__[self.field.name] = self.to_python(value)
+    @property
+    def raw(self) -> str:
+        return self._raw
 
-    @staticmethod
-    def to_python(value):
-        if isinstance(value, Board):
-            return value
+    @property
+    def board(self) -> Board:
+        if self._board is None:
+            self._board = self._field.load_board(self._raw)
+        return self._board
+
+    def __getattr__(self, name):
+        # Only delegate what the board class declares, so probes such as
+        # Django's hasattr(value, 'resolve_expression') don't load the board.
+        board_class = self._field.board_class
+        if name.startswith('_') or not (
+                hasattr(board_class, name) or name in getattr(board_class, '__annotations__', {})):
+            raise AttributeError(name)
+        return getattr(self.board, name)
+
+    def __getitem__(self, item):
+        return self.board[item]
+
+    def __setitem__(self, key, value):
+        self.board[key] = value
 
-        return Board.deserialize(value)
+    def __delitem__(self, item):
+        del self.board[item]
+
+    def __iter__(self):
+        return iter(self.board)
+
+    def __reduce_ex__(self, protocol):
+        # Unpickles as the plain board
+        return self._field.board_class.deserialize, (self.board.serialize(),)
+
+    def serialize(self):
+        return self.board.serialize()
+
+
+class BoardDescriptor(DeferredAttribute):
+    """
+    Load a deferred board for every instance fetched alongside this one.
+
+    Instances yielded by a BoardQuerySet share a set of peers; the first
+    access to a deferred board fetches that column for all peers still
+    missing it, instead of one refresh_from_db per instance.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+
+        attname = self.field.attname
+        if attname not in instance.__dict__ and instance.pk is not None:
+            peers = getattr(instance, '_board_peers', None)
+            if peers is not None:
+                self.load_peers(instance, peers)
+        return super().__get__(instance, cls)
+
+    def load_peers(self, instance, peers):
+        attname = self.field.attname
+        pending = {
+            peer.pk: peer
+            for peer in list(peers)
+            if type(peer) is type(instance) and attname not in peer.__dict__
+        }
+        pending[instance.pk] = instance
+        queryset = type(instance)._base_manager.db_manager(instance._state.db).order_by()
+        for batch in chunks(list(pending), PEER_BATCH_SIZE):
+            for pk, value in queryset.filter(pk__in=batch).values_list('pk', attname):
+                pending[pk].__dict__[attname] = value
 
 
 class BoardField(models.Field):
 
     description = 'Board'
 
-    def __init__(self, board_class, *args, **kwargs):
+    descriptor_class = BoardDescriptor
+
+    def __init__(self, board_class, *args, storage_format: str = JSON, **kwargs):
+        if storage_format not in STORAGE_FORMATS:
+            raise ValueError(f"Unknown storage format {storage_format}")
         super().__init__(*args, **kwargs)
         self.board_class = board_class
+        self.storage_format = storage_format
 
     def get_db_prep_value(self, value, connection, prepared=False):
         """
         Perform preliminary non-db specific value checks and conversions.
         """
-        return json.dumps(value.serialize()) if isinstance(value, Board) else value
+        if isinstance(value, LazyBoard) and not value.is_loaded:
+            if get_storage_format(value.raw) == self.storage_format:
+                return value.raw
+            return self.encode(decode_board(value.raw))
+        return self.encode(value.serialize()) if isinstance(value, Board) else value
+
+    def encode(self, rows: List[List[Optional[str]]]) -> str:
+        return json.dumps(rows) if self.storage_format == JSON else encode_compact(rows)
 
     def from_db_value(self, value, expression, connection):
-        return self.board_class.deserialize(json.loads(value))
+        if value is None:
+            return value
+        return LazyBoard(value, self)
+
+    def load_board(self, value: str) -> Board:
+        # Either format reads back, so rows can be converted gradually
+        return self.board_class.deserialize(decode_board(value))
 
     def to_python(self, value):
         if isinstance(value, Board):
@@ -77,4 +213,38 @@ class BoardField(models.Field):
     def deconstruct(self):
         name, path, args, kwargs = super().deconstruct()
         kwargs["board_class"] = self.board_class
+        if self.storage_format != JSON:
+            kwargs["storage_format"] = self.storage_format
         return name, path, args, kwargs
+
+
+class BoardModelIterable(ModelIterable):
+    """
+    Let the instances of a result set share their peers when a board
+    field was deferred, see BoardDescriptor.
+    """
+
+    def __iter__(self):
+        peers = weakref.WeakSet()
+        deferred = None
+        for obj in super().__iter__():
+            if deferred is None:
+                deferred = self.has_deferred_boards(obj)
+            if deferred:
+                obj._board_peers = peers
+                peers.add(obj)
+            yield obj
+
+    @staticmethod
+    def has_deferred_boards(obj) -> bool:
+        return any(
+            isinstance(field, BoardField) and field.attname not in obj.__dict__
+            for field in obj._meta.concrete_fields
+        )
+
+
+class BoardQuerySet(models.QuerySet):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._iterable_class = BoardModelIterable
@@ -0,0 +1,104 @@
+import re
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from django.conf import settings
+
+
+BLANK = ' '
+
+_NON_ZERO = re.compile(rb'[^\x00]')
+
+_BITS = tuple(
+    tuple(bit for bit in range(8) if value >> bit & 1)
+    for value in range(256)
+)
+
+
+class WordIndex:
+    """
+    In-memory dictionary of words of a single length.
+
+    Every (position, letter) pair maps to a bitset (a plain int) with one
+    bit per word, so matching a pattern is an intersection of bitsets.
+    """
+
+    size: int
+
+    words: Sequence[str]
+
+    masks: Dict[Tuple[int, str], int]
+
+    def __init__(self, size: int, words: Sequence[str]):
+        self.size = size
+        self.words = list(words)
+        self.all = (1 << len(self.words)) - 1
+        self.masks = self._build_masks()
+
+    def __len__(self):
+        return len(self.words)
+
+    def _build_masks(self) -> Dict[Tuple[int, str], int]:
+        num_bytes = (len(self.words) + 7) // 8
+        bitsets: Dict[Tuple[int, str], bytearray] = {}
+        for index, word in enumerate(self.words):
+            byte, bit = divmod(index, 8)
+            for position, letter in enumerate(word):
+                bitset = bitsets.get((position, letter))
+                if bitset is None:
+                    bitset = bitsets[(position, letter)] = bytearray(num_bytes)
+                bitset[byte] |= 1 << bit
+        return {
+            key: int.from_bytes(bitset, 'little')
+            for key, bitset in bitsets.items()
+        }
+
+    def mask(self, position: int, letter: str) -> int:
+        return self.masks.get((position, letter), 0)
+
+    def match(self, pattern: str) -> int:
+        result = self.all
+        for position, letter in enumerate(pattern):
+            if letter == BLANK:
+                continue
+            result &= self.mask(position, letter)
+            if not result:
+                break
+        return result
+
+    def has_words(self, pattern: str) -> bool:
+        return self.match(pattern) != 0
+
+    def get_words(self, pattern: str) -> List[str]:
+        return self.select(self.match(pattern))
+
+    def select(self, mask: int) -> List[str]:
+        return [self.words[index] for index in iter_bits(mask)]
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+    for match in _NON_ZERO.finditer(data):
+        offset = match.start() * 8
+        for bit in _BITS[data[match.start()]]:
+            yield offset + bit
+
+
+_indexes: Dict[int, WordIndex] = {}
+
+
+def get_word_index(size: int) -> WordIndex:
+    from puzzle.common.snapshot import get_snapshot
+    from puzzle.models import Word
+
+    if settings.PUZZLE_WORD_SNAPSHOT:
+        return get_snapshot(settings.PUZZLE_WORD_SNAPSHOT).index(size)
+
+    index = _indexes.get(size)
+    if index is None:
+        index = WordIndex(size, Word.objects.filter(size=size).values_list('word', flat=True))
+        _indexes[size] = index
+    return index
+
+
+def clear_word_indexes():
+    _indexes.clear()
@@ -0,0 +1,198 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterable, List, Optional
+
+from django.core.signals import request_started
+from django.dispatch import receiver
+
+from puzzle.common.index import iter_bits, WordIndex
+
+
+MAGIC = b'PZWORDS1'
+
+# Magic, then the length of the JSON table of contents that follows it
+HEADER = struct.Struct('<8sI')
+
+
+def write_snapshot(path: str, words_by_size: Dict[int, Iterable[str]]) -> int:
+    """
+    Write a read-only dictionary snapshot and return the number of words
+    in it.
+
+    Per word length the words are stored sorted and fixed-width, one byte
+    per letter (a code into the alphabet of the snapshot), followed by the
+    bitset of every (position, letter) pair as WordIndex builds them. A
+    JSON table of contents up front holds the alphabet and the offsets.
+    """
+    sizes = {size: sorted(set(words)) for size, words in words_by_size.items()}
+    alphabet = ''.join(sorted({letter for words in sizes.values() for word in words for letter in word}))
+    if len(alphabet) > 256:
+        raise ValueError("A snapshot holds at most 256 distinct letters")
+    encoding = str.maketrans(alphabet, bytes(range(len(alphabet))).decode('latin-1'))
+
+    chunks = []
+    offset = 0
+    contents = {'alphabet': alphabet, 'sizes': {}}
+    for size, words in sorted(sizes.items()):
+        data = ''.join(words).translate(encoding).encode('latin-1')
+        table = {'words': [offset, len(words)], 'masks': []}
+        chunks.append(data)
+        offset += len(data)
+        for (position, letter), mask in WordIndex(size, words).masks.items():
+            data = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+            table['masks'].append([position, letter, offset, len(data)])
+            chunks.append(data)
+            offset += len(data)
+        contents['sizes'][str(size)] = table
+
+    header = json.dumps(contents).encode()
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile('wb', dir=directory, delete=False) as fh:
+        fh.write(HEADER.pack(MAGIC, len(header)))
+        fh.write(header)
+        for data in chunks:
+            fh.write(data)
+    os.chmod(fh.name, 0o644)
+    # Replace rather than overwrite, so that open mappings stay valid
+    os.replace(fh.name, path)
+    return sum(len(words) for words in sizes.values())
+
+
+class WordSnapshot:
+    """
+    A snapshot file mapped into memory. Processes mapping the same file
+    share its pages, and a word length is only decoded when it is used.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as fh:
+            self.inode = os.fstat(fh.fileno()).st_ino
+            self.data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.data)
+        magic, header_length = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a word snapshot")
+        contents = json.loads(self.data[HEADER.size:(HEADER.size + header_length)])
+        self.offset = HEADER.size + header_length
+        self.alphabet = contents['alphabet']
+        self.sizes = {int(size): table for size, table in contents['sizes'].items()}
+        self._indexes: Dict[int, WordIndex] = {}
+
+    def index(self, size: int) -> WordIndex:
+        index = self._indexes.get(size)
+        if index is None:
+            table = self.sizes.get(size)
+            index = MappedWordIndex(self, size, table) if table else WordIndex(size, [])
+            self._indexes[size] = index
+        return index
+
+    def read(self, offset: int, length: int) -> memoryview:
+        # A view, so that nothing is copied out of the mapping until it is
+        # converted
+        return self.view[(self.offset + offset):(self.offset + offset + length)]
+
+
+class MappedMasks(Mapping):
+    """
+    The bitsets of one word length in a snapshot. Every lookup converts
+    the bytes in the mapping to an int, and nothing is kept, so the only
+    copy of the bitsets is in the pages the processes share.
+    """
+
+    def __init__(self, snapshot: WordSnapshot, table: List[list]):
+        self.snapshot = snapshot
+        self.offsets = {(position, letter): (offset, length) for position, letter, offset, length in table}
+
+    def __getitem__(self, key):
+        return int.from_bytes(self.snapshot.read(*self.offsets[key]), 'little')
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+
+class MappedWords(Sequence):
+    """
+    The words of one length in a snapshot; a word is decoded from its
+    slice of the mapping when it is read.
+    """
+
+    def __init__(self, snapshot: WordSnapshot, size: int, offset: int, num_words: int):
+        self.snapshot = snapshot
+        self.size = size
+        self.offset = offset
+        self.num_words = num_words
+        self.decoding = str.maketrans(bytes(range(len(snapshot.alphabet))).decode('latin-1'), snapshot.alphabet)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.num_words))]
+        if index < 0:
+            index += self.num_words
+        if not 0 <= index < self.num_words:
+            raise IndexError("word index out of range")
+        data = self.snapshot.read(self.offset + index * self.size, self.size)
+        return str(data, 'latin-1').translate(self.decoding)
+
+    def __len__(self):
+        return self.num_words
+
+    def take(self, indexes: Iterable[int]) -> List[str]:
+        # Decode all of them in one go, which is much cheaper than per word
+        size = self.size
+        data = self.snapshot.read(self.offset, self.num_words * size)
+        letters = str(b''.join([data[(index * size):((index + 1) * size)] for index in indexes]), 'latin-1')
+        letters = letters.translate(self.decoding)
+        return [letters[pos:(pos + size)] for pos in range(0, len(letters), size)]
+
+
+class MappedWordIndex(WordIndex):
+    """
+    WordIndex over one word length of a snapshot; the words and bitsets
+    are read from the mapping when used instead of built from a query.
+    """
+
+    def __init__(self, snapshot: WordSnapshot, size: int, table: dict):
+        offset, num_words = table['words']
+        self.snapshot = snapshot
+        self.size = size
+        self.all = (1 << num_words) - 1
+        self.masks = MappedMasks(snapshot, table['masks'])
+        self.words = MappedWords(snapshot, size, offset, num_words)
+
+    def select(self, mask: int) -> List[str]:
+        return self.words.take(iter_bits(mask))
+
+
+_snapshot: Optional[WordSnapshot] = None
+
+# Whether the file was checked for a rebuild since the snapshot expired
+_checked = False
+
+
+def get_snapshot(path: str) -> WordSnapshot:
+    """
+    Return the snapshot at path. Once after every expire_snapshot(), that
+    is once per request or generation run, the file is checked and mapped
+    again when a rebuild replaced it.
+    """
+    global _snapshot, _checked
+
+    if _snapshot is None or _snapshot.path != path or (not _checked and os.stat(path).st_ino != _snapshot.inode):
+        _snapshot = WordSnapshot(path)
+    _checked = True
+    return _snapshot
+
+
+@receiver(request_started)
+def expire_snapshot(**kwargs):
+    global _checked
+
+    _checked = False
@@ -1,20 +1,112 @@
-from typing import Dict, List
+import csv
+import random
+from io import StringIO
+from typing import Callable, Dict, Iterable, List, Optional
 
+from django.db import connection, transaction
 
-def import_words(words: List[str]):
-    from puzzle.models import Word, WordToken
+from puzzle.common.index import clear_word_indexes
 
-    wds = []
-    for wd in words:
-        if 4 <= len(wd) <= 10:
-            wds.append(Word(word=wd.upper(), size=len(wd)))
-    words = Word.objects.bulk_create(wds)
-    tks = []
+
+IMPORT_BATCH_SIZE = 5000
+
+
+def import_words(words: Iterable[str], batch_size: int = IMPORT_BATCH_SIZE,
+                 progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """
+    Import words from an iterable of lines, batch by batch, and return the
+    number of new words. Duplicates are dropped within a batch and left to
+    the database across batches, so memory use doesn't grow with the input.
+    """
+    insert = copy_words if connection.vendor == 'postgresql' else insert_words
+    num_lines = 0
+    num_written = 0
+    batch = {}
+    for line in words:
+        num_lines += 1
+        if (word := normalize_word(line)) is not None:
+            batch[word] = None
+        if len(batch) == batch_size:
+            num_written += insert(list(batch))
+            batch.clear()
+            if progress:
+                progress(num_lines, num_written)
+    if batch:
+        num_written += insert(list(batch))
+    if progress:
+        progress(num_lines, num_written)
+    clear_word_indexes()
+    return num_written
+
+
+def normalize_word(line: str) -> Optional[str]:
+    word = line.strip().upper()
+    return word if 4 <= len(word) <= 10 else None
+
+
+def insert_words(words: List[str]) -> int:
+    """
+    Insert the words that are not in the dictionary yet and return how
+    many were. bulk_create doesn't tell with conflicts ignored, so the
+    words of the batch that exist already are looked up first; one that a
+    concurrent import adds in between is counted by both.
+    """
+    from puzzle.models import Word
+
+    with transaction.atomic():
+        existing = set(Word.objects.filter(word__in=words).values_list('word', flat=True))
+        objs = []
+        for wd in words:
+            if wd in existing:
+                continue
+            word = Word(word=wd, size=len(wd))
+            word.set_letters()
+            objs.append(word)
+        Word.objects.bulk_create(objs, ignore_conflicts=True)
+    return len(objs)
+
+
+def copy_words(words: List[str]) -> int:
+    """
+    Postgres only: COPY the words into a temporary table and move them over
+    with ON CONFLICT DO NOTHING, which COPY itself doesn't support. Returns
+    the number of words inserted.
+    """
+    from puzzle.models import Word
+
+    quote_name = connection.ops.quote_name
+    columns = ', '.join(
+        quote_name(Word._meta.get_field(name).column)
+        for name in ['word', 'size'] + [Word.letter_field(index) for index in range(Word.MAX_SIZE)]
+    )
+    buffer = StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
     for word in words:
-        tokens = tokenize_word(word.word)
-        for index, token in tokens.items():
-            tks.append(WordToken(word=word, index=index, token=token))
-    WordToken.objects.bulk_create(tks)
+        tokens = tokenize_word(word)
+        writer.writerow([word, len(word)] + [tokens.get(index, '') for index in range(Word.MAX_SIZE)])
+    buffer.seek(0)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE import_word AS '
+            f'SELECT {columns} FROM {quote_name(Word._meta.db_table)} WITH NO DATA'
+        )
+        cursor.copy_expert(f'COPY import_word ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+        cursor.execute(
+            f'INSERT INTO {quote_name(Word._meta.db_table)} ({columns}) '
+            f'SELECT {columns} FROM import_word ON CONFLICT DO NOTHING'
+        )
+        num_inserted = cursor.rowcount
+        cursor.execute('DROP TABLE import_word')
+    return num_inserted
+
+
+def get_rng(rng: Optional[random.Random] = None) -> random.Random:
+    """
+    The generator to draw from: the one passed in, or else the random
+    module itself and its shared global state.
+    """
+    return random if rng is None else rng
 
 
 def tokenize_word(word: str) -> Dict[int, str]:
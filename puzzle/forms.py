@@ -213,8 +213,8 @@ class ImportWordsForm(forms.Form):
     import_file = forms.FileField()
 
     def save(self):
-        words = self.cleaned_data['import_file'].open('r').read().decode().splitlines()
-        import_words(words)
+        import_file = self.cleaned_data['import_file'].open('rb')
+        import_words(line.decode() for line in import_file)
 
 
 class ImportWordSquareForm(forms.Form):
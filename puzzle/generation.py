@@ -0,0 +1,154 @@
+import multiprocessing
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Type
+
+from django.db import connections, transaction
+
+from puzzle.common.snapshot import expire_snapshot
+
+
+BATCH_SIZE = 10
+
+MAX_ATTEMPTS_PER_PUZZLE = 20
+
+
+@dataclass
+class GenerationSummary:
+    attempts: int = 0
+    successes: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def failures(self) -> int:
+        return self.attempts - self.successes
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.attempts if self.attempts else 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.successes / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f'{self.successes} puzzles generated in {self.attempts} attempts '
+            f'({self.failure_rate:.0%} failed), {self.elapsed:.1f}s, {self.rate:.2f} puzzles/s'
+        )
+
+
+def run_attempt(attempt: Callable, args: Tuple, seed: Optional[int]):
+    # Every attempt draws from its own generator, seeded from the OS unless
+    # a seed is given, so workers never share a random stream.
+    return attempt(*args, rng=random.Random(seed))
+
+
+class PuzzleGenerator:
+    """
+    Run generation attempts, in a pool of worker processes if asked to,
+    until enough puzzles are made or the attempt or time budget runs out.
+
+    Attempts only compute the puzzle and must be picklable module level
+    functions taking an rng keyword. The results are turned into puzzles
+    (images included) and saved in batches by the calling process.
+    """
+
+    def __init__(self, attempt: Callable, args: Tuple, build: Callable[[Any, random.Random], Any],
+                 errors: Tuple[Type[Exception], ...], workers: int = 1,
+                 max_attempts: Optional[int] = None, time_limit: Optional[float] = None,
+                 batch_size: int = BATCH_SIZE, seed: Optional[int] = None,
+                 on_failure: Optional[Callable[[Exception], None]] = None,
+                 on_progress: Optional[Callable[[GenerationSummary], None]] = None):
+        self.attempt = attempt
+        self.args = args
+        self.build = build
+        self.errors = errors
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.time_limit = time_limit
+        self.batch_size = batch_size
+        self.seed = seed
+        self.on_failure = on_failure
+        self.on_progress = on_progress
+        self.rng = random.Random(seed)
+
+    def run(self, num_puzzles: int) -> GenerationSummary:
+        summary = GenerationSummary()
+        max_attempts = self.max_attempts or num_puzzles * MAX_ATTEMPTS_PER_PUZZLE
+        deadline = time.monotonic() + self.time_limit if self.time_limit else None
+        start = time.monotonic()
+        # Pick up a rebuilt word snapshot, once for the whole run
+        expire_snapshot()
+        batch = []
+        outcomes = self._run_pool if self.workers > 1 else self._run_inline
+        for result, error in outcomes(num_puzzles, summary, max_attempts, deadline):
+            summary.attempts += 1
+            if error is not None:
+                if self.on_failure:
+                    self.on_failure(error)
+                continue
+            summary.successes += 1
+            batch.append(self.build(result, self.rng))
+            if len(batch) == self.batch_size:
+                self._save(batch, summary, start)
+        self._save(batch, summary, start)
+        return summary
+
+    def _save(self, batch: List, summary: GenerationSummary, start: float):
+        if batch:
+            with transaction.atomic():
+                for puzzle in batch:
+                    puzzle.save()
+            batch.clear()
+        summary.elapsed = time.monotonic() - start
+        if self.on_progress:
+            self.on_progress(summary)
+
+    def _may_attempt(self, submitted: int, max_attempts: int, deadline: Optional[float]) -> bool:
+        return submitted < max_attempts and (deadline is None or time.monotonic() < deadline)
+
+    def _seed(self, submitted: int) -> Optional[int]:
+        return None if self.seed is None else self.seed + submitted
+
+    def _run_inline(self, num_puzzles, summary, max_attempts, deadline) -> Iterator[Tuple[Any, Optional[Exception]]]:
+        while summary.successes < num_puzzles and self._may_attempt(summary.attempts, max_attempts, deadline):
+            try:
+                yield run_attempt(self.attempt, self.args, self._seed(summary.attempts)), None
+            except self.errors as e:
+                yield None, e
+
+    def _run_pool(self, num_puzzles, summary, max_attempts, deadline) -> Iterator[Tuple[Any, Optional[Exception]]]:
+        # Children must not share the connection of this process
+        connections.close_all()
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('fork')
+        )
+        pending = set()
+        submitted = 0
+        try:
+            while True:
+                # Keep every worker busy until enough puzzles are made, as
+                # any of the attempts in flight may fail
+                while (
+                    len(pending) < self.workers * 2
+                    and self._may_attempt(submitted, max_attempts, deadline)
+                ):
+                    pending.add(executor.submit(run_attempt, self.attempt, self.args, self._seed(submitted)))
+                    submitted += 1
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    error = future.exception()
+                    if error is not None and not isinstance(error, self.errors):
+                        raise error
+                    yield (None, error) if error is not None else (future.result(), None)
+                    if summary.successes >= num_puzzles:
+                        return
+        finally:
+            # Drop the attempts still in flight, their puzzles aren't needed
+            executor.shutdown(wait=False, cancel_futures=True)
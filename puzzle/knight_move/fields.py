@@ -1,23 +1,42 @@
-from typing import Any, List
+from typing import Any, Dict, List, Tuple
 
 from puzzle.common.fields import Board as BaseBoard
 from puzzle.common.utils import chunks
 from puzzle.knight_move.exceptions import SlotNotAvailableError, SlotOutOfRangeError
 from puzzle.knight_move.models import Slot
+from puzzle.knight_move.paths import Cell, get_moves_table, get_path_table, PathTable
 
 
 class Board(BaseBoard):
 
     slots: List[Slot]
 
+    grid: Dict[Cell, Slot]
+
+    num_rows: int
+
+    num_columns: int
+
+    moves: Dict[Cell, Tuple[Cell, ...]]
+
+    num_filled: int
+
     def __init__(self, slots: List[Slot]):
         self.slots = slots
+        self.grid = {(slot.x, slot.y): slot for slot in slots}
+        self.num_rows = max((slot.x for slot in slots), default=-1) + 1
+        self.num_columns = max((slot.y for slot in slots), default=-1) + 1
+        self.moves = get_moves_table(self.num_rows, self.num_columns)
+        # Kept up to date by __setitem__, which is how slots are filled
+        self.num_filled = sum(bool(slot.letter) for slot in slots)
 
     def __setitem__(self, key, value):
         slot = self._get_slot(key)
         if slot.letter:
             raise SlotNotAvailableError()
         slot.letter = value
+        if value:
+            self.num_filled += 1
 
     def __getitem__(self, item):
         return self._get_slot(item)
@@ -25,44 +44,28 @@ class Board(BaseBoard):
     def __iter__(self):
         return iter(self.slots)
 
-    def is_valid(self, word: str, slots: List[Slot] = None):
-        slots = slots or [slot for slot in self.slots if slot.letter != '*']
-        if len(slots) != len(word):
-            return False
-
-        if len(slots) == 1:
-            return slots[0].letter == word[0]
-
-        for slot in filter(lambda s: s.letter == word[0], slots):
-            if not (slts := self.get_moves(slot.x, slot.y, should_be_empty=False)):
-                break
-            for slt in slts:
-                if slt.letter == word[1]:
-                    sls = slots[:]
-                    sls.remove(slot)
-                    if self.is_valid(word[1:], sls):
-                        return True
-
-        return False
+    def is_valid(self, word: str):
+        letters = {cell: slot.letter for cell, slot in self.grid.items()}
+        return self.path_table.find_path(letters, word) is not None
 
     def get_moves(self, x: int, y: int, should_be_empty: bool = True) -> List[Slot]:
-        result = []
-        options = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
-        for xx, yy in options:
-            try:
-                if not self[x + xx, y + yy].letter or not should_be_empty:
-                    result.append(self[x + xx, y + yy])
-            except SlotOutOfRangeError:
-                ...
-        return result
+        return [
+            self.grid[cell] for cell in self.moves.get((x, y), ())
+            if cell in self.grid and (not should_be_empty or not self.grid[cell].letter)
+        ]
+
+    @property
+    def path_table(self) -> PathTable:
+        blocked = frozenset(cell for cell, slot in self.grid.items() if slot.letter == '*')
+        return get_path_table(self.num_rows, self.num_columns, blocked)
 
     @property
     def is_full(self):
-        return all(slot.letter for slot in self.slots)
+        return self.num_filled == len(self.slots)
 
     @property
     def rows(self):
-        return chunks(self.slots, 3)
+        return chunks(self.slots, self.num_columns)
 
     def _get_slot(self, key: Any) -> Slot:
         try:
@@ -71,7 +74,7 @@ class Board(BaseBoard):
                 raise ValueError()
         except ValueError:
             raise ValueError("Can only slice x, y coordinates")
-        slot = next(filter(lambda s: s.x == x and s.y == y, self.slots), None)
+        slot = self.grid.get((x, y))
         if slot is None:
             raise SlotOutOfRangeError()
         return slot
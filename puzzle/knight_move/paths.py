@@ -0,0 +1,163 @@
+import random
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+Cell = Tuple[int, int]
+
+Path = Tuple[Cell, ...]
+
+MOVES = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+
+# Larger boards have too many paths to list them all. The table then holds
+# what was found within these limits and validation searches the board,
+# within a budget of its own.
+MAX_PATHS = 20000
+MAX_STEPS = 50000
+MAX_SEARCH_STEPS = 100000
+
+# Path tables kept around, one per board geometry and blocked cells
+PATH_TABLES = 32
+
+
+@lru_cache(maxsize=None)
+def get_moves_table(num_rows: int, num_columns: int) -> Dict[Cell, Tuple[Cell, ...]]:
+    """
+    The cells a knight can move to from every cell of the board.
+    """
+    return {
+        (x, y): tuple(
+            (x + dx, y + dy) for dx, dy in MOVES
+            if 0 <= x + dx < num_rows and 0 <= y + dy < num_columns
+        )
+        for x in range(num_rows)
+        for y in range(num_columns)
+    }
+
+
+class PathTable:
+    """
+    The knight's paths through every open cell of a board geometry, i.e.
+    the orders in which a word can be written on it.
+    """
+
+    def __init__(self, num_rows: int, num_columns: int, blocked: FrozenSet[Cell] = frozenset(),
+                 max_paths: int = MAX_PATHS, max_steps: int = MAX_STEPS):
+        self.cells: List[Cell] = [
+            (x, y) for x in range(num_rows) for y in range(num_columns) if (x, y) not in blocked
+        ]
+        moves = get_moves_table(num_rows, num_columns)
+        self.neighbours: Dict[Cell, Tuple[Cell, ...]] = {
+            cell: tuple(move for move in moves[cell] if move not in blocked)
+            for cell in self.cells
+        }
+        self.paths: List[Path] = []
+        self.complete = self._find_paths(max_paths, max_steps)
+        self.paths_by_start: Dict[Cell, List[Path]] = {}
+        for path in self.paths:
+            self.paths_by_start.setdefault(path[0], []).append(path)
+
+    def _find_paths(self, max_paths: int, max_steps: int) -> bool:
+        num_cells = len(self.cells)
+        if not num_cells:
+            return True
+
+        path: List[Cell] = []
+        visited = set()
+        # Every start cell gets its share of the steps, so that a table cut
+        # short still has paths from all over the board
+        steps_per_start = max(1, max_steps // num_cells)
+        steps = 0
+
+        def onward(cell: Cell) -> int:
+            return sum(neighbour not in visited for neighbour in self.neighbours[cell])
+
+        def extend(cell: Cell) -> bool:
+            nonlocal steps
+            steps += 1
+            if steps > steps_per_start:
+                return False
+            path.append(cell)
+            visited.add(cell)
+            if len(path) == num_cells:
+                self.paths.append(tuple(path))
+            else:
+                # Fewest onward moves first (Warnsdorff), which finds paths
+                # early when the search is cut short
+                for neighbour in sorted(self.neighbours[cell], key=onward):
+                    if neighbour not in visited and not extend(neighbour):
+                        break
+            path.pop()
+            visited.remove(cell)
+            return steps <= steps_per_start and len(self.paths) < max_paths
+
+        complete = True
+        for cell in self.cells:
+            steps = 0
+            complete = extend(cell) and complete
+            if len(self.paths) >= max_paths:
+                return False
+        return complete
+
+    def random_path(self, rng: random.Random) -> Optional[Path]:
+        return rng.choice(self.paths) if self.paths else None
+
+    def find_path(self, letters: Dict[Cell, str], word: str) -> Optional[Path]:
+        """
+        Return the path that spells word on a board with these letters.
+        """
+        if len(word) != len(self.cells):
+            return None
+        # No path can help if the board holds other letters than the word
+        if Counter(letters.get(cell) for cell in self.cells) != Counter(word):
+            return None
+        for start in self.cells:
+            if letters.get(start) != word[0]:
+                continue
+            for path in self.paths_by_start.get(start, []):
+                if all(letters.get(cell) == letter for cell, letter in zip(path, word)):
+                    return path
+        if self.complete:
+            return None
+        return self._search(letters, word, MAX_SEARCH_STEPS)
+
+    def _search(self, letters: Dict[Cell, str], word: str, max_steps: int) -> Optional[Path]:
+        # Only follows cells holding the next letter. Where letters repeat
+        # the same cells are reached in many orders, so dead ends are
+        # remembered by cell and the set of cells visited.
+        bits = {cell: 1 << number for number, cell in enumerate(self.cells)}
+        dead_ends: Set[Tuple[Cell, int]] = set()
+        path: List[Cell] = []
+        steps = 0
+
+        def extend(cell: Cell, visited: int) -> bool:
+            nonlocal steps
+            steps += 1
+            if steps > max_steps or (cell, visited) in dead_ends:
+                return False
+            path.append(cell)
+            if len(path) == len(word):
+                return True
+            letter = word[len(path)]
+            onward = [
+                neighbour for neighbour in self.neighbours[cell]
+                if letters.get(neighbour) == letter and not visited & bits[neighbour]
+            ]
+            onward.sort(key=lambda neighbour: sum(not visited & bits[n] for n in self.neighbours[neighbour]))
+            for neighbour in onward:
+                if extend(neighbour, visited | bits[neighbour]):
+                    return True
+            path.pop()
+            if steps <= max_steps:
+                dead_ends.add((cell, visited))
+            return False
+
+        for start in self.cells:
+            if letters.get(start) == word[0] and extend(start, bits[start]):
+                return tuple(path)
+        return None
+
+
+@lru_cache(maxsize=PATH_TABLES)
+def get_path_table(num_rows: int, num_columns: int, blocked: FrozenSet[Cell] = frozenset()) -> PathTable:
+    return PathTable(num_rows, num_columns, blocked)
@@ -1,24 +1,22 @@
 import random
-from typing import List
+from typing import List, Optional
 
+from puzzle.common.utils import get_rng
 from puzzle.knight_move.exceptions import NoMovesError
 from puzzle.knight_move.fields import Board
 
 
-def generate_knight_move(word: str) -> List[List[str]]:
+def generate_knight_move(word: str, rng: Optional[random.Random] = None) -> List[List[str]]:
+    rng = get_rng(rng)
     board = Board.deserialize([
         [None, None, None],
         [None, '*', None],
         [None, None, None]
     ])
-    options = [slot for slot in board if slot.letter != '*']
-    slot = options[random.randint(0, len(options) - 1)]
-    letter_index = 0
-    board[(slot.x, slot.y)] = word[letter_index]
-    while not board.is_full:
-        if not (slots := board.get_moves(slot.x, slot.y)):
-            raise NoMovesError()
-        slot = random.choice(slots)
-        letter_index += 1
-        board[(slot.x, slot.y)] = word[letter_index]
+    # Every order a word can be written in is in the path table
+    path = board.path_table.random_path(rng)
+    if path is None or len(path) != len(word):
+        raise NoMovesError()
+    for (x, y), letter in zip(path, word):
+        board[(x, y)] = letter
     return board.serialize()
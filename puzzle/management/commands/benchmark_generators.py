@@ -0,0 +1,52 @@
+import json
+import random
+
+from django.core.management import BaseCommand, CommandError
+
+from puzzle.benchmark import check_budgets, run_benchmarks, synthetic_words
+
+
+class Command(BaseCommand):
+
+    help = "Management command to benchmark the puzzle generators against a fixed dictionary"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--words-per-size', type=int, default=2000,
+                            help="Size of the synthetic dictionary, per word length")
+        parser.add_argument('--dictionary', help="Word list to use instead of a synthetic dictionary")
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--case', action='append', dest='cases', help="Only run this case (repeatable)")
+        parser.add_argument('--output', help="Write the results as JSON to this file")
+        parser.add_argument('--budget', help="JSON file of budgets per case; fail when one is exceeded")
+
+    def handle(self, *args, **options):
+        if options['dictionary']:
+            with open(options['dictionary']) as fh:
+                words = [line.strip().upper() for line in fh if line.strip()]
+        else:
+            words = synthetic_words(random.Random(options['seed']), options['words_per_size'])
+
+        results = run_benchmarks(words, options['runs'], options['seed'], options['cases'])
+        for result in results:
+            print(
+                f'{result.name:<22} p50 {result.p50_ms:9.2f}ms  p90 {result.p90_ms:9.2f}ms  '
+                f'p99 {result.p99_ms:9.2f}ms  success {result.success_rate:4.0%}  '
+                f'queries {result.queries_per_run:g} ({result.cold_queries} cold)  '
+                f'peak {result.peak_memory_kb:.0f}KB'
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump({
+                    'runs': options['runs'],
+                    'seed': options['seed'],
+                    'words': len(words),
+                    'results': [result.as_dict() for result in results]
+                }, fh, indent=2)
+
+        if options['budget']:
+            with open(options['budget']) as fh:
+                violations = check_budgets(results, json.load(fh))
+            if violations:
+                raise CommandError("Budget exceeded:\n" + '\n'.join(violations))
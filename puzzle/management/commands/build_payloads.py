@@ -0,0 +1,34 @@
+from django.core.management import BaseCommand
+
+from puzzle.models import Puzzle
+
+
+class Command(BaseCommand):
+
+    help = "Management command to store the image hash and API payload of puzzles saved without one"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Rebuild payloads that are already stored")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        queryset = Puzzle.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            queryset = queryset.filter(payload='')
+
+        batch = []
+        num_built = 0
+        for puzzle in queryset.select_subclasses().order_by('pk').iterator(chunk_size=options['batch_size']):
+            puzzle.refresh_payload()
+            batch.append(Puzzle(pk=puzzle.pk, image_hash=puzzle.image_hash, payload=puzzle.payload))
+            if len(batch) == options['batch_size']:
+                num_built += self.flush(batch)
+        num_built += self.flush(batch)
+        print(f'{num_built} payloads built')
+
+    @staticmethod
+    def flush(batch):
+        Puzzle.objects.bulk_update(batch, ['image_hash', 'payload'])
+        num_flushed = len(batch)
+        batch.clear()
+        return num_flushed
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from puzzle.common.snapshot import write_snapshot
+from puzzle.models import Word
+
+
+class Command(BaseCommand):
+
+    help = "Management command to compile the dictionary into a snapshot file for puzzle generation"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=settings.PUZZLE_WORD_SNAPSHOT)
+
+    def handle(self, *args, **options):
+        if not options['path']:
+            raise CommandError("Pass a path or set PUZZLE_WORD_SNAPSHOT")
+
+        sizes = Word.objects.order_by('size').values_list('size', flat=True).distinct()
+        num_words = write_snapshot(options['path'], {
+            size: Word.objects.filter(size=size).values_list('word', flat=True).iterator()
+            for size in sizes
+        })
+        print(f'{num_words} words written to {options["path"]}')
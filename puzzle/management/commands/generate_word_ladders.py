@@ -1,7 +1,10 @@
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
 
+from puzzle.generation import BATCH_SIZE, PuzzleGenerator
 from puzzle.models import WordLadder
 from puzzle.word_ladder.exceptions import WordLadderCreateError
+from puzzle.word_ladder.graph import get_word_graph
+from puzzle.word_ladder.utils import generate_word_ladder
 
 
 class Command(BaseCommand):
@@ -11,17 +14,36 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('size', type=int, nargs=1)
         parser.add_argument('num_puzzles', type=int, nargs=1)
+        parser.add_argument('--workers', type=int, default=1, help="Number of processes searching ladders")
+        parser.add_argument('--max-attempts', type=int, help="Give up after this many attempts")
+        parser.add_argument('--time-limit', type=float, help="Stop starting attempts after this many seconds")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--seed', type=int, help="Seed the attempts, for reproducible runs")
 
     def handle(self, *args, **options):
-        num_generated = 0
+        size = options['size'][0]
         num_puzzles = options['num_puzzles'][0]
-        while True:
-            if num_generated == num_puzzles:
-                break
-            try:
-                word_ladder = WordLadder(width=options['size'][0])
-                word_ladder.generate()
-                num_generated += 1
-                print(f'{num_generated}/{num_puzzles} puzzles generated')
-            except WordLadderCreateError:
-                ...
+
+        def build(words, rng):
+            word_ladder = WordLadder(width=size)
+            word_ladder.import_puzzle(words=words)
+            return word_ladder
+
+        # Build the word graph once, before any workers are forked
+        get_word_graph(size)
+        generator = PuzzleGenerator(
+            generate_word_ladder,
+            (size,),
+            build,
+            errors=(WordLadderCreateError,),
+            workers=options['workers'],
+            max_attempts=options['max_attempts'],
+            time_limit=options['time_limit'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            on_progress=lambda summary: print(f'{summary.successes}/{num_puzzles} puzzles generated')
+        )
+        summary = generator.run(num_puzzles)
+        print(summary)
+        if summary.successes < num_puzzles:
+            raise CommandError(f"Gave up with {summary.successes}/{num_puzzles} puzzles generated")
@@ -1,7 +1,11 @@
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
 
+from puzzle.common.index import get_word_index
+from puzzle.generation import BATCH_SIZE, PuzzleGenerator
 from puzzle.models import WordSquare
 from puzzle.word_square.exceptions import WordSquareCreateError
+from puzzle.word_square.models import SolverStats
+from puzzle.word_square.utils import attempt_word_square
 
 
 class Command(BaseCommand):
@@ -11,17 +15,48 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('size', type=int, nargs=1)
         parser.add_argument('num_puzzles', type=int, nargs=1)
+        parser.add_argument('--workers', type=int, default=1, help="Number of processes solving squares")
+        parser.add_argument('--max-attempts', type=int, help="Give up after this many attempts")
+        parser.add_argument('--time-limit', type=float, help="Stop starting attempts after this many seconds")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--seed', type=int, help="Seed the attempts, for reproducible runs")
 
     def handle(self, *args, **options):
-        num_generated = 0
+        size = options['size'][0]
         num_puzzles = options['num_puzzles'][0]
-        while True:
-            if num_generated == num_puzzles:
-                break
-            try:
-                word_square = WordSquare(size=options['size'][0])
-                word_square.generate()
-                num_generated += 1
-                print(f'{num_generated}/{num_puzzles} puzzles generated')
-            except WordSquareCreateError:
-                ...
+
+        total = SolverStats()
+
+        def build(result, rng):
+            words, stats = result
+            total.add(stats)
+            print(f'Solved in {stats.nodes} nodes, {stats.backtracks} backtracks')
+            word_square = WordSquare(size=size)
+            word_square.import_puzzle(words=words, rng=rng)
+            return word_square
+
+        def on_failure(error):
+            stats, = error.args
+            total.add(stats)
+            print(f'Gave up after {stats.nodes} nodes, {stats.backtracks} backtracks, retrying')
+
+        # Load the dictionary once, before any workers are forked
+        get_word_index(size)
+        generator = PuzzleGenerator(
+            attempt_word_square,
+            (size,),
+            build,
+            errors=(WordSquareCreateError,),
+            workers=options['workers'],
+            max_attempts=options['max_attempts'],
+            time_limit=options['time_limit'],
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            on_failure=on_failure,
+            on_progress=lambda summary: print(f'{summary.successes}/{num_puzzles} puzzles generated')
+        )
+        summary = generator.run(num_puzzles)
+        print(summary)
+        print(f'{total.nodes} nodes, {total.backtracks} backtracks in total')
+        if summary.successes < num_puzzles:
+            raise CommandError(f"Gave up with {summary.successes}/{num_puzzles} puzzles generated")
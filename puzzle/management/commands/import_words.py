@@ -0,0 +1,30 @@
+import sys
+import time
+
+from django.core.management import BaseCommand
+
+from puzzle.common.utils import import_words, IMPORT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+
+    help = "Management command to import a word list, one word per line"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Path of the word list, or - to read from stdin")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--encoding', default='utf-8')
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+
+        def progress(num_lines, num_written):
+            elapsed = time.monotonic() - start
+            print(f'{num_lines} lines read, {num_written} words written ({num_lines / max(elapsed, 1e-6):.0f} lines/s)')
+
+        if options['path'] == '-':
+            num_imported = import_words(sys.stdin, options['batch_size'], progress)
+        else:
+            with open(options['path'], encoding=options['encoding']) as fh:
+                num_imported = import_words(fh, options['batch_size'], progress)
+        print(f'{num_imported} words imported in {time.monotonic() - start:.1f}s')
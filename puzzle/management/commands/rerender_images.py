@@ -0,0 +1,54 @@
+import json
+import os
+
+from django.core.management import BaseCommand
+
+from puzzle.models import Puzzle
+from puzzle.rerender import CHUNK_SIZE, ImageRerenderer
+
+
+class Command(BaseCommand):
+
+    help = "Management command to render the images of stored puzzles again, e.g. after a renderer change"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--type', action='append', dest='puzzle_types', choices=Puzzle.PuzzleType.values,
+                            help="Only re-render puzzles of this type (repeatable)")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--workers', type=int, default=1, help="Number of processes rendering images")
+        parser.add_argument('--state', help="File keeping the last processed pk per type, to resume from")
+
+    def handle(self, *args, **options):
+        state = {}
+        if options['state'] and os.path.exists(options['state']):
+            with open(options['state']) as fh:
+                state = json.load(fh)
+
+        def save_state():
+            if not options['state']:
+                return
+            if state:
+                with open(options['state'], 'w') as fh:
+                    json.dump(state, fh)
+            elif os.path.exists(options['state']):
+                # Nothing left to resume, the next run starts over
+                os.remove(options['state'])
+
+        def on_chunk(puzzle_type, summary):
+            print(f'{puzzle_type}: {summary}, up to pk {summary.last_pk}')
+            state[puzzle_type] = summary.last_pk
+            save_state()
+
+        for puzzle_type, model in Puzzle.get_subclasses().items():
+            if options['puzzle_types'] and puzzle_type not in options['puzzle_types']:
+                continue
+            rerenderer = ImageRerenderer(
+                model,
+                chunk_size=options['chunk_size'],
+                workers=options['workers'],
+                on_chunk=lambda summary: on_chunk(puzzle_type, summary)
+            )
+            summary = rerenderer.run(after=state.get(puzzle_type))
+            print(f'{puzzle_type}: {summary}')
+            state.pop(puzzle_type, None)
+            save_state()
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.9 on 2026-10-18 06:10
+
+from django.db import migrations, models
+
+
+def number_puzzles(apps, schema_editor):
+    Puzzle = apps.get_model('puzzle', 'Puzzle')
+    sequences = {}
+    puzzles = []
+    for puzzle in Puzzle.objects.order_by('pk').only('pk', 'puzzle_type'):
+        sequences[puzzle.puzzle_type] = sequences.get(puzzle.puzzle_type, 0) + 1
+        puzzle.sequence = sequences[puzzle.puzzle_type]
+        puzzles.append(puzzle)
+    Puzzle.objects.bulk_update(puzzles, ['sequence'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('puzzle', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='puzzle',
+            name='sequence',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(number_puzzles, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='puzzle',
+            constraint=models.UniqueConstraint(fields=('puzzle_type', 'sequence'), name='Unique constraint on puzzle type and sequence'),
+        ),
+    ]
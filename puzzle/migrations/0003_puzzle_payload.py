@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-18 06:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('puzzle', '0002_puzzle_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='puzzle',
+            name='payload',
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
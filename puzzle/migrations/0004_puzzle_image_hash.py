@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-18 06:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('puzzle', '0003_puzzle_payload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='puzzle',
+            name='image_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.9 on 2026-10-18 06:18
+
+from django.db import migrations
+import puzzle.common.fields
+import puzzle.knight_move.fields
+import puzzle.word_finder.fields
+import puzzle.word_ladder.fields
+import puzzle.word_square.fields
+
+
+BOARD_FIELDS = {
+    'knightmove': ['board'],
+    'wordfinder': ['board'],
+    'wordladder': ['board', 'solution'],
+    'wordsquare': ['board', 'solution'],
+}
+
+
+def convert_boards(apps, schema_editor):
+    # Saving a board that was never deserialized rewrites its raw value in
+    # the storage format of the field in the current migration state.
+    for model_name, fields in BOARD_FIELDS.items():
+        model = apps.get_model('puzzle', model_name)
+        puzzles = []
+        for instance in model.objects.order_by('pk').only(*fields).iterator(chunk_size=500):
+            puzzles.append(instance)
+            if len(puzzles) == 500:
+                model.objects.bulk_update(puzzles, fields)
+                puzzles = []
+        model.objects.bulk_update(puzzles, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('puzzle', '0004_puzzle_image_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, convert_boards),
+        migrations.AlterField(
+            model_name='knightmove',
+            name='board',
+            field=puzzle.common.fields.BoardField(board_class=puzzle.knight_move.fields.Board, storage_format='compact'),
+        ),
+        migrations.AlterField(
+            model_name='wordfinder',
+            name='board',
+            field=puzzle.common.fields.BoardField(board_class=puzzle.word_finder.fields.Board, storage_format='compact'),
+        ),
+        migrations.AlterField(
+            model_name='wordladder',
+            name='board',
+            field=puzzle.common.fields.BoardField(board_class=puzzle.word_ladder.fields.Board, storage_format='compact'),
+        ),
+        migrations.AlterField(
+            model_name='wordladder',
+            name='solution',
+            field=puzzle.common.fields.BoardField(board_class=puzzle.word_ladder.fields.Board, storage_format='compact'),
+        ),
+        migrations.AlterField(
+            model_name='wordsquare',
+            name='board',
+            field=puzzle.common.fields.BoardField(board_class=puzzle.word_square.fields.Board, storage_format='compact'),
+        ),
+        migrations.AlterField(
+            model_name='wordsquare',
+            name='solution',
+            field=puzzle.common.fields.BoardField(board_class=puzzle.word_square.fields.Board, storage_format='compact'),
+        ),
+        migrations.RunPython(convert_boards, migrations.RunPython.noop),
+    ]
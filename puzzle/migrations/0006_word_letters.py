@@ -0,0 +1,137 @@
+# Generated by Django 4.2.9 on 2026-10-18 06:20
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+def set_letters(apps, schema_editor):
+    Word = apps.get_model('puzzle', 'Word')
+    fields = [f'letter_{index}' for index in range(10)]
+    words = []
+    for word in Word.objects.order_by('pk').only('pk', 'word').iterator(chunk_size=BATCH_SIZE):
+        for index in range(10):
+            setattr(word, f'letter_{index}', word.word[index] if index < len(word.word) else '')
+        words.append(word)
+        if len(words) == BATCH_SIZE:
+            Word.objects.bulk_update(words, fields)
+            words = []
+    Word.objects.bulk_update(words, fields)
+
+
+def create_tokens(apps, schema_editor):
+    Word = apps.get_model('puzzle', 'Word')
+    WordToken = apps.get_model('puzzle', 'WordToken')
+    tokens = []
+    for pk, word in Word.objects.order_by('pk').values_list('pk', 'word').iterator(chunk_size=BATCH_SIZE):
+        tokens.extend(WordToken(word_id=pk, index=index, token=token) for index, token in enumerate(word))
+        if len(tokens) >= BATCH_SIZE:
+            WordToken.objects.bulk_create(tokens)
+            tokens = []
+    WordToken.objects.bulk_create(tokens)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('puzzle', '0005_compact_boards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='word',
+            name='letter_0',
+            field=models.CharField(blank=True, editable=False, max_length=1),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='letter_1',
+            field=models.CharField(blank=True, editable=False, max_length=1),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='letter_2',
+            field=models.CharField(blank=True, editable=False, max_length=1),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='letter_3',
+            field=models.CharField(blank=True, editable=False, max_length=1),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='letter_4',
+            field=models.CharField(blank=True, editable=False, max_length=1),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='letter_5',
+            field=models.CharField(blank=True, editable=False, max_length=1),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='letter_6',
+            field=models.CharField(blank=True, editable=False, max_length=1),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='letter_7',
+            field=models.CharField(blank=True, editable=False, max_length=1),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='letter_8',
+            field=models.CharField(blank=True, editable=False, max_length=1),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='letter_9',
+            field=models.CharField(blank=True, editable=False, max_length=1),
+        ),
+        migrations.RunPython(set_letters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(fields=['size', 'letter_0'], name='word_size_letter_0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(fields=['size', 'letter_1'], name='word_size_letter_1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(fields=['size', 'letter_2'], name='word_size_letter_2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(fields=['size', 'letter_3'], name='word_size_letter_3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(fields=['size', 'letter_4'], name='word_size_letter_4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(fields=['size', 'letter_5'], name='word_size_letter_5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(fields=['size', 'letter_6'], name='word_size_letter_6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(fields=['size', 'letter_7'], name='word_size_letter_7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(fields=['size', 'letter_8'], name='word_size_letter_8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='word',
+            index=models.Index(fields=['size', 'letter_9'], name='word_size_letter_9_idx'),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, create_tokens),
+        migrations.DeleteModel(
+            name='WordToken',
+        ),
+    ]
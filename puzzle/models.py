@@ -1,19 +1,18 @@
-import base64
-import os
-import tempfile
+import hashlib
+import random
 import uuid
-from io import BytesIO
-from typing import BinaryIO, Dict
+from typing import BinaryIO, Dict, Optional, Type
 
-import matplotlib.pyplot as plt
-import seaborn as sns
-from django.conf import settings
 from django.core.validators import MaxValueValidator, ValidationError
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
-from PIL import Image, ImageDraw, ImageFont
 
-from puzzle.common.fields import BoardField
+from puzzle.common.fields import BoardField, BoardModelIterable, BoardQuerySet, COMPACT
+from puzzle.common.index import clear_word_indexes
+from puzzle.common.utils import tokenize_word
 from puzzle.knight_move import fields as knight_move_fields
 from puzzle.knight_move import utils as knight_move_utils
 from puzzle.pie_slice.utils import obfuscate_word
@@ -25,24 +24,57 @@ from puzzle.word_ladder import fields as word_ladder_fields
 from puzzle.word_ladder import utils as word_ladder_utils
 from puzzle.word_square import fields as word_square_fields
 from puzzle.word_square import utils as word_square_utils
+from puzzle.word_square.models import SolverStats
+
+
+# Saves that lost the race for the next sequence number to another save
+# are retried with a fresh number this many times.
+SEQUENCE_ATTEMPTS = 5
 
 
 def image_upload_to(instance, filename):
     return f'images/{uuid.uuid4()}.png'
 
 
-class PuzzleQuerySet(models.QuerySet):
+class PuzzleQuerySet(BoardQuerySet):
+
+    def last_sequence(self, puzzle_type: str) -> int:
+        return self.filter(puzzle_type=puzzle_type).aggregate(last=models.Max('sequence'))['last'] or 0
+
+    def next_sequence(self, puzzle_type: str) -> int:
+        return self.last_sequence(puzzle_type) + 1
+
+    def fill_sequence_gap(self, puzzle_type: str, sequence: int):
+        with transaction.atomic():
+            # Lock the last puzzle, so that concurrent deletes fill their gaps
+            # one after the other. The last sequence is read after the lock
+            # is granted, and so includes the move of a fill that held it.
+            list(self.select_for_update().filter(puzzle_type=puzzle_type).order_by('-sequence').values('pk')[:1])
+            last = self.last_sequence(puzzle_type)
+            if last > sequence:
+                self.filter(puzzle_type=puzzle_type, sequence=last).update(sequence=sequence)
+
+    def select_subclasses(self):
+        """
+        Join every puzzle subclass table, so that iterating yields the
+        concrete KnightMove, PieSlice, ... instances from a single query.
+        """
+        queryset = self.select_related(*(
+            model._meta.model_name
+            for model in Puzzle.get_subclasses().values()
+        ))
+        queryset._iterable_class = SubclassModelIterable
+        return queryset
 
     def get_narrow(self, pk):
-        obj = self.get(pk=pk)
-        model = {
-            Puzzle.PuzzleType.KNIGHT_MOVE: KnightMove,
-            Puzzle.PuzzleType.PIE_SLICE: PieSlice,
-            Puzzle.PuzzleType.WORD_FINDER: WordFinder,
-            Puzzle.PuzzleType.WORD_SQUARE: WordSquare,
-            Puzzle.PuzzleType.WORD_LADDER: WordLadder
-        }.get(obj.puzzle_type)
-        return model.objects.get(pk=pk)
+        return self.select_subclasses().get(pk=pk)
+
+
+class SubclassModelIterable(BoardModelIterable):
+
+    def __iter__(self):
+        for obj in super().__iter__():
+            yield obj.narrow()
 
 
 class Puzzle(models.Model):
@@ -60,31 +92,119 @@ class Puzzle(models.Model):
 
     puzzle_type = models.CharField(max_length=12, choices=PuzzleType.choices)
 
+    # Dense 1..n numbering per puzzle type, used to pick a random puzzle
+    # with an index lookup (see puzzle.selection).
+    sequence = models.PositiveIntegerField(null=True, blank=True, editable=False)
+
+    # Content hash of the image, which makes up its URL (see get_image_url)
+    image_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+
+    # The rendered API response, rebuilt on every save
+    payload = models.TextField(blank=True, editable=False)
+
     objects = PuzzleQuerySet.as_manager()
 
+    # Name of the image file image_hash was computed from. Image files get a
+    # new name whenever they are written, so an equal name means an equal hash.
+    _hashed_image: Optional[str] = None
+
     class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('puzzle_type', 'sequence'),
+                name='Unique constraint on puzzle type and sequence'
+            )
+        ]
         ordering = ("-puzzle_time",)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The stored hash is that of the stored image, unless it is deferred
+        instance._hashed_image = instance.__dict__.get('image')
+        return instance
+
     def save(self, generate: bool = True, *args, **kwargs):
         self.puzzle_type = self.get_puzzle_type()
         if not self.image and generate:
             self.generate()
-        super().save(*args, **kwargs)
+        self.refresh_payload()
+        if self.sequence is not None:
+            super().save(*args, **kwargs)
+            return
+
+        for attempt in range(SEQUENCE_ATTEMPTS):
+            self.sequence = Puzzle.objects.next_sequence(self.puzzle_type)
+            try:
+                # A savepoint, so that a clash leaves the transaction usable
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                taken = Puzzle.objects.filter(puzzle_type=self.puzzle_type, sequence=self.sequence).exists()
+                self.sequence = None
+                if not taken or attempt == SEQUENCE_ATTEMPTS - 1:
+                    raise
+
+    def refresh_payload(self):
+        if self.image:
+            if not self.image_hash or self.image.name != self._hashed_image:
+                self.image_hash = self.compute_image_hash()
+                self._hashed_image = self.image.name
+            self.payload = self.build_payload()
+        else:
+            self.image_hash = ''
+            self.payload = ''
+
+    def compute_image_hash(self) -> str:
+        with self.image.open('rb') as fh:
+            return hashlib.sha256(fh.read()).hexdigest()
+
+    def build_payload(self) -> str:
+        from puzzle.api.serializers import render_payload
+
+        return render_payload(self)
+
+    def get_image_url(self) -> str:
+        return reverse('api:image', args=[self.image_hash])
+
+    @staticmethod
+    def get_subclasses() -> Dict[str, Type['Puzzle']]:
+        return {
+            Puzzle.PuzzleType.KNIGHT_MOVE: KnightMove,
+            Puzzle.PuzzleType.PIE_SLICE: PieSlice,
+            Puzzle.PuzzleType.WORD_FINDER: WordFinder,
+            Puzzle.PuzzleType.WORD_SQUARE: WordSquare,
+            Puzzle.PuzzleType.WORD_LADDER: WordLadder
+        }
+
+    def narrow(self) -> 'Puzzle':
+        if type(self) is not Puzzle:
+            return self
+        model = self.get_subclasses()[self.puzzle_type]
+        # Served from the select_related cache when there is one
+        return getattr(self, model._meta.model_name)
 
     def get_puzzle_type(self):
         raise NotImplementedError()
 
-    def generate(self):
+    def generate(self, rng: Optional[random.Random] = None):
         raise NotImplementedError()
 
     def import_puzzle(self, **kwargs):
         raise NotImplementedError()
 
+    def render_images(self) -> Dict[str, BinaryIO]:
+        """
+        Draw the image fields of the puzzle from its stored data.
+        """
+        raise NotImplementedError()
+
     def get_puzzle_data(self):
         raise NotImplementedError()
 
 
-class WordPuzzleQuerySet(models.QuerySet):
+class WordPuzzleQuerySet(BoardQuerySet):
 
     def validate_word(self, instance, word_length: int):
         if len(instance.word) != word_length:
@@ -98,7 +218,7 @@ class WordPuzzleQuerySet(models.QuerySet):
 
 class KnightMove(Puzzle):
 
-    board = BoardField(board_class=knight_move_fields.Board)
+    board = BoardField(board_class=knight_move_fields.Board, storage_format=COMPACT)
 
     word = models.CharField(max_length=8, unique=True)
 
@@ -120,12 +240,12 @@ class KnightMove(Puzzle):
 
     def get_puzzle_data(self):
         return {
-            'data': base64.b64encode(self.image.open().read()).decode(),
+            'image': self.get_image_url(),
             'solution': self.word
         }
 
-    def generate(self):
-        letters = knight_move_utils.generate_knight_move(self.word)
+    def generate(self, rng: Optional[random.Random] = None):
+        letters = knight_move_utils.generate_knight_move(self.word, rng=rng)
         self.board = knight_move_fields.Board.deserialize(letters)
         self.image.save(f'{self.word}.png', self.draw_image(self.board))
 
@@ -133,42 +253,14 @@ class KnightMove(Puzzle):
         self.board = knight_move_fields.Board.deserialize(kwargs.get('slots', []))
         self.image.save(f'{self.word}.png', self.draw_image(self.board))
 
+    def render_images(self):
+        return {'image': self.draw_image(self.board)}
+
     @staticmethod
     def draw_image(board: knight_move_fields.Board) -> BinaryIO:
-        width = 300
-        height = 300
-        image = Image.new(mode='L', size=(width + 1, height + 1), color=255)
-
-        # Draw some lines
-        draw = ImageDraw.Draw(image)
-        y_start = 0
-        y_end = height
-        step_size = int(width / 3)
-
-        for x in range(0, width + step_size, step_size):
-            line = ((x, y_start), (x, y_end))
-            draw.line(line, fill=128)
-
-        x_start = 0
-        x_end = width
-
-        for y in range(0, height + step_size, step_size):
-            line = ((x_start, y), (x_end, y))
-            draw.line(line, fill=128)
-
-        font = ImageFont.truetype(os.path.join(settings.PROJECT_DIR, 'puzzle', 'Arial.ttf'), 50)
-
-        for board_y, x in enumerate(range(0, width, step_size)):
-            for board_x, y in enumerate(range(0, height, step_size)):
-                letter = board[(board_x, board_y)].letter
-                inc_size = 32 if letter == '*' else 25
-                draw.text((x + inc_size, y + inc_size), letter, font=font)
+        from puzzle.rendering import draw_knight_move
 
-        del draw
-
-        fh = BytesIO()
-        image.save(fh, format='PNG')
-        return fh
+        return draw_knight_move(board)
 
 
 class PieSlice(Puzzle):
@@ -195,50 +287,30 @@ class PieSlice(Puzzle):
 
     def get_puzzle_data(self):
         return {
-            'data': base64.b64encode(self.image.open().read()).decode(),
+            'image': self.get_image_url(),
             'solution': self.word
         }
 
-    def generate(self):
-        self.obfuscated_word = obfuscate_word(self.word)
+    def generate(self, rng: Optional[random.Random] = None):
+        self.obfuscated_word = obfuscate_word(self.word, rng=rng)
         self.image.save(f'{self.word}.png', self.draw_image(self.obfuscated_word))
 
     def import_puzzle(self, **kwargs):
         self.image.save(f'{self.word}.png', self.draw_image(self.obfuscated_word))
 
+    def render_images(self):
+        return {'image': self.draw_image(self.obfuscated_word)}
+
     @staticmethod
-    def draw_image(word: str):
-        sns.set(font_scale=1.2)
-        fig = plt.figure(figsize=(10, 10))
-        fig.patch.set_facecolor("red")
-
-        patches, texts = plt.pie(
-            x=9 * [100 / 9],
-            labels=list(word),
-            colors=["white"],
-            startangle=90,
-            # Bring labels inside the pie
-            labeldistance=0.7,
-            wedgeprops={"edgecolor": "black", 'linewidth': 1, 'linestyle': 'solid', 'antialiased': True}
-        )
-
-        # iterate over the text labels
-        # make each label bold and center-aligned
-        for text in texts:
-            text.set_fontweight('bold')
-            text.set_horizontalalignment('center')
-
-        tmp = tempfile.NamedTemporaryFile(suffix='.png')
-        plt.show()
-        plt.savefig(tmp.name)
-        fh = open(tmp.name, 'rb')
-        fh.seek(0)
-        return fh
+    def draw_image(word: str) -> BinaryIO:
+        from puzzle.pie_slice.rendering import get_pie_renderer
+
+        return get_pie_renderer()(word)
 
 
 class WordFinder(Puzzle):
 
-    board = BoardField(board_class=word_finder_fields.Board)
+    board = BoardField(board_class=word_finder_fields.Board, storage_format=COMPACT)
 
     hints = models.TextField(blank=True)
 
@@ -248,6 +320,9 @@ class WordFinder(Puzzle):
 
     words = models.TextField(blank=True)
 
+    # The generator clean() draws a new board from, the random module if unset
+    rng: Optional[random.Random] = None
+
     def __str__(self):
         return self.solution
 
@@ -255,16 +330,19 @@ class WordFinder(Puzzle):
         self.words = '\n'.join(map(lambda w: w.strip().upper(), self.words.splitlines()))
         if not self.image and self.size:
             try:
-                response = word_finder_utils.generate_word_finder(CreateWordFinderRequest(
-                    words=self.words.splitlines(),
-                    size=self.size
-                ))
-                self.hints = '\n'.join(response.hints)
-                self.solution = response.solution
-                self.board = word_finder_fields.Board.deserialize(response.words)
+                self.generate_board(self.rng)
             except WordFinderCreateError:
                 raise ValidationError("Could not create a solution")
 
+    def generate_board(self, rng: Optional[random.Random] = None):
+        response = word_finder_utils.generate_word_finder(CreateWordFinderRequest(
+            words=self.words.splitlines(),
+            size=self.size
+        ), rng=rng)
+        self.hints = '\n'.join(response.hints)
+        self.solution = response.solution
+        self.board = word_finder_fields.Board.deserialize(response.words)
+
     def get_puzzle_type(self):
         return self.PuzzleType.WORD_FINDER
 
@@ -276,7 +354,7 @@ class WordFinder(Puzzle):
             'solution': self.solution
         }
 
-    def generate(self):
+    def generate(self, rng: Optional[random.Random] = None):
         self.image.save('word_finder.png', self.draw_image(self.board))
 
     def import_puzzle(self, **kwargs):
@@ -284,71 +362,61 @@ class WordFinder(Puzzle):
         self.board = word_finder_fields.Board.deserialize(words)
         self.image.save('word_finder.png', self.draw_image(self.board))
 
+    def render_images(self):
+        return {'image': self.draw_image(self.board)}
+
     def draw_image(self, board: word_finder_fields.Board) -> BinaryIO:
-        words = board.simple()
-        width = 100 * self.size
-        height = 100 * self.size
-        image = Image.new(mode='L', size=(width + 1, height + 1), color=255)
+        from puzzle.rendering import draw_word_finder
 
-        # Draw some lines
-        draw = ImageDraw.Draw(image)
-        y_start = 0
-        y_end = height
-        step_size = int(width / self.size)
+        return draw_word_finder(board, self.size)
 
-        for x in range(0, width + step_size, step_size):
-            line = ((x, y_start), (x, y_end))
-            draw.line(line, fill=128)
 
-        x_start = 0
-        x_end = width
+class WordQuerySet(models.QuerySet):
 
-        for y in range(0, height + step_size, step_size):
-            line = ((x_start, y), (x_end, y))
-            draw.line(line, fill=128)
+    def get_for_tokens(self, tokens: Dict[int, str]):
+        return self.filter(**{
+            Word.letter_field(index): token
+            for index, token in tokens.items()
+        })
 
-        font = ImageFont.truetype(os.path.join(settings.PROJECT_DIR, 'puzzle', 'Arial.ttf'), 50)
 
-        for board_x, y in enumerate(range(0, width, step_size)):
-            for board_y, x in enumerate(range(0, height, step_size)):
-                letter = words[board_x][board_y]
-                inc_size = 25
-                draw.text((x + inc_size, y + inc_size), letter, font=font)
+class Word(models.Model):
 
-        del draw
+    word = models.CharField(max_length=10, unique=True)
 
-        fh = BytesIO()
-        image.save(fh, format='PNG')
-        return fh
+    size = models.PositiveIntegerField()
 
+    # The letter at every position, blank past the end of the word, so that
+    # patterns are matched on the row itself (see get_for_tokens).
+    letter_0 = models.CharField(max_length=1, blank=True, editable=False)
 
-class WordQuerySet(models.QuerySet):
+    letter_1 = models.CharField(max_length=1, blank=True, editable=False)
 
-    def get_for_tokens(self, tokens: Dict[int, str]):
-        queryset = self._clone()
-        clause = models.Q()
-        for index, token in tokens.items():
-            clause &= models.Q(
-                models.Exists(
-                    WordToken.objects.filter(
-                        word__pk=models.OuterRef('pk'),
-                        index=index,
-                        token=token
-                    )
-                )
-            )
-        return queryset.filter(clause)
+    letter_2 = models.CharField(max_length=1, blank=True, editable=False)
 
+    letter_3 = models.CharField(max_length=1, blank=True, editable=False)
 
-class Word(models.Model):
+    letter_4 = models.CharField(max_length=1, blank=True, editable=False)
 
-    word = models.CharField(max_length=10, unique=True)
+    letter_5 = models.CharField(max_length=1, blank=True, editable=False)
 
-    size = models.PositiveIntegerField()
+    letter_6 = models.CharField(max_length=1, blank=True, editable=False)
+
+    letter_7 = models.CharField(max_length=1, blank=True, editable=False)
+
+    letter_8 = models.CharField(max_length=1, blank=True, editable=False)
+
+    letter_9 = models.CharField(max_length=1, blank=True, editable=False)
 
     objects = WordQuerySet.as_manager()
 
+    MAX_SIZE = 10
+
     class Meta:
+        indexes = [
+            models.Index(fields=('size', f'letter_{index}'), name=f'word_size_letter_{index}_idx')
+            for index in range(10)
+        ]
         ordering = ('word',)
 
     def __str__(self):
@@ -357,40 +425,43 @@ class Word(models.Model):
     def save(self, *args, **kwargs):
         self.word = self.word.upper()
         self.size = len(self.word)
+        self.set_letters()
         super().save(*args, **kwargs)
 
+    def set_letters(self):
+        tokens = tokenize_word(self.word)
+        for index in range(self.MAX_SIZE):
+            setattr(self, self.letter_field(index), tokens.get(index, ''))
 
-class WordToken(models.Model):
-
-    word = models.ForeignKey(Word, related_name='tokens', on_delete=models.CASCADE)
+    @staticmethod
+    def letter_field(index: int) -> str:
+        return f'letter_{index}'
 
-    index = models.PositiveIntegerField()
 
-    token = models.CharField(max_length=1)
+@receiver(post_delete, sender=Puzzle)
+def puzzle_deleted(sender, instance, **kwargs):
+    if instance.sequence is not None:
+        Puzzle.objects.fill_sequence_gap(instance.puzzle_type, instance.sequence)
 
-    class Meta:
-        constraints = [
-            models.UniqueConstraint(
-                fields=('word', 'index'),
-                name='Unique constraint on word and index'
-            )
-        ]
-        ordering = ('word', 'index')
 
-    def __str__(self):
-        return f'{self.word} - {self.index}'
+@receiver(post_save, sender=Word)
+@receiver(post_delete, sender=Word)
+def word_changed(sender, **kwargs):
+    clear_word_indexes()
 
 
 class WordSquare(Puzzle):
 
-    board = BoardField(board_class=word_square_fields.Board)
+    board = BoardField(board_class=word_square_fields.Board, storage_format=COMPACT)
 
     size = models.PositiveIntegerField(validators=[MaxValueValidator(10)])
 
-    solution = BoardField(board_class=word_square_fields.Board)
+    solution = BoardField(board_class=word_square_fields.Board, storage_format=COMPACT)
 
     solution_image = models.ImageField(null=True, blank=True, upload_to=image_upload_to)
 
+    solver_stats: SolverStats = None
+
     def __str__(self):
         return 'word square'
 
@@ -407,67 +478,39 @@ class WordSquare(Puzzle):
             'solution': self.solution.serialize()
         }
 
-    def generate(self):
-        words = word_square_utils.generate_word_square(self.size)
+    def generate(self, rng: Optional[random.Random] = None):
+        self.solver_stats = SolverStats()
+        words = word_square_utils.generate_word_square(self.size, stats=self.solver_stats, rng=rng)
         self.solution = word_square_fields.Board.deserialize(words)
-        self.board = word_square_utils.obfuscate_board(self.solution)
+        self.board = word_square_utils.obfuscate_board(self.solution, rng=rng)
         self.image.save('word_square.png', self.draw_image(self.board))
         self.solution_image.save('word_square.png', self.draw_image(self.solution))
 
     def import_puzzle(self, **kwargs):
         words = kwargs.get('words', [])
         self.solution = word_square_fields.Board.deserialize(words)
-        self.board = word_square_utils.obfuscate_board(self.solution)
+        self.board = word_square_utils.obfuscate_board(self.solution, rng=kwargs.get('rng'))
         self.image.save('word_square.png', self.draw_image(self.board))
         self.solution_image.save('word_square.png', self.draw_image(self.solution))
 
-    def draw_image(self, board: word_square_fields.Board) -> BinaryIO:
-        words = board.simple()
-        width = 100 * self.size
-        height = 100 * self.size
-        image = Image.new(mode='L', size=(width + 1, height + 1), color=255)
-
-        # Draw some lines
-        draw = ImageDraw.Draw(image)
-        y_start = 0
-        y_end = height
-        step_size = int(width / self.size)
-
-        for x in range(0, width + step_size, step_size):
-            line = ((x, y_start), (x, y_end))
-            draw.line(line, fill=128)
-
-        x_start = 0
-        x_end = width
-
-        for y in range(0, height + step_size, step_size):
-            line = ((x_start, y), (x_end, y))
-            draw.line(line, fill=128)
+    def render_images(self):
+        return {'image': self.draw_image(self.board), 'solution_image': self.draw_image(self.solution)}
 
-        font = ImageFont.truetype(os.path.join(settings.PROJECT_DIR, 'puzzle', 'Arial.ttf'), 50)
-
-        for board_x, y in enumerate(range(0, width, step_size)):
-            for board_y, x in enumerate(range(0, height, step_size)):
-                letter = words[board_x][board_y]
-                inc_size = 25
-                draw.text((x + inc_size, y + inc_size), letter, font=font)
-
-        del draw
+    def draw_image(self, board: word_square_fields.Board) -> BinaryIO:
+        from puzzle.rendering import draw_word_square
 
-        fh = BytesIO()
-        image.save(fh, format='PNG')
-        return fh
+        return draw_word_square(board, self.size)
 
 
 class WordLadder(Puzzle):
 
-    board = BoardField(board_class=word_ladder_fields.Board)
+    board = BoardField(board_class=word_ladder_fields.Board, storage_format=COMPACT)
 
     width = models.PositiveIntegerField(validators=[MaxValueValidator(10)])
 
     height = models.PositiveIntegerField(validators=[MaxValueValidator(10)])
 
-    solution = BoardField(board_class=word_ladder_fields.Board)
+    solution = BoardField(board_class=word_ladder_fields.Board, storage_format=COMPACT)
 
     solution_image = models.ImageField(null=True, blank=True, upload_to=image_upload_to)
 
@@ -483,8 +526,8 @@ class WordLadder(Puzzle):
             'solution': self.solution.serialize()
         }
 
-    def generate(self):
-        words = word_ladder_utils.generate_word_ladder(self.width)
+    def generate(self, rng: Optional[random.Random] = None):
+        words = word_ladder_utils.generate_word_ladder(self.width, rng=rng)
         self.height = len(words)
         self.solution = word_ladder_fields.Board.deserialize(words)
         self.board = word_ladder_utils.obfuscate_board(self.solution)
@@ -499,40 +542,10 @@ class WordLadder(Puzzle):
         self.image.save('word_ladder.png', self.draw_image(self.board))
         self.solution_image.save('word_ladder.png', self.draw_image(self.solution))
 
+    def render_images(self):
+        return {'image': self.draw_image(self.board), 'solution_image': self.draw_image(self.solution)}
+
     def draw_image(self, board: word_ladder_fields.Board) -> BinaryIO:
-        words = board.simple()
-        width = 100 * self.width
-        height = 100 * self.height
-        image = Image.new(mode='L', size=(width + 1, height + 1), color=255)
-
-        # Draw some lines
-        draw = ImageDraw.Draw(image)
-        y_start = 0
-        y_end = height
-        row_step_size = int(width / self.width)
-
-        for x in range(0, width + row_step_size, row_step_size):
-            line = ((x, y_start), (x, y_end))
-            draw.line(line, fill=128)
-
-        x_start = 0
-        x_end = width
-        col_step_size = int(height / self.height)
-
-        for y in range(0, height + col_step_size, col_step_size):
-            line = ((x_start, y), (x_end, y))
-            draw.line(line, fill=128)
-
-        font = ImageFont.truetype(os.path.join(settings.PROJECT_DIR, 'puzzle', 'Arial.ttf'), 50)
-
-        for board_x, y in enumerate(range(0, height, col_step_size)):
-            for board_y, x in enumerate(range(0, width, row_step_size)):
-                letter = words[board_x][board_y]
-                inc_size = 25
-                draw.text((x + inc_size, y + inc_size), letter, font=font)
-
-        del draw
-
-        fh = BytesIO()
-        image.save(fh, format='PNG')
-        return fh
+        from puzzle.rendering import draw_word_ladder
+
+        return draw_word_ladder(board, self.width, self.height)
@@ -0,0 +1,141 @@
+import math
+import os
+from functools import lru_cache
+from io import BytesIO
+from typing import BinaryIO
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from PIL import Image, ImageDraw, ImageFont
+
+
+# Geometry of the former matplotlib figure: 10x10 inches at 100 dpi, the
+# pie filling the default axes
+IMAGE_SIZE = 1000
+CENTER = (512, 505)
+RADIUS = 308
+LABEL_DISTANCE = 0.7
+LABEL_SIZE = 18
+
+BACKGROUND = (255, 0, 0)
+FILL = (255, 255, 255)
+OUTLINE = (0, 0, 0)
+TEXT = (38, 38, 38)
+
+# Wedges are drawn at this multiple of the image size and scaled down, which
+# anti-aliases the outlines
+SUPERSAMPLE = 2
+
+# Palette entries of the wedges; the ones after it shade from the wedge
+# fill to the text colour, for anti-aliased labels
+WEDGE_COLORS = 128
+TEXT_LEVELS = 32
+
+
+@lru_cache(maxsize=None)
+def get_label_font() -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(os.path.join(settings.PROJECT_DIR, 'puzzle', 'Arial.ttf'), LABEL_SIZE)
+
+
+@lru_cache(maxsize=None)
+def get_wedges(num_slices: int) -> Image.Image:
+    """
+    The empty pie, as a palette image so that it encodes quickly. It only
+    depends on the number of slices and is drawn once per process.
+    """
+    step = 360 / num_slices
+    image = Image.new('RGB', (IMAGE_SIZE, IMAGE_SIZE), BACKGROUND)
+
+    # Only the square around the pie is supersampled
+    size = (2 * RADIUS + 3) * SUPERSAMPLE
+    pie = Image.new('RGB', (size, size), BACKGROUND)
+    draw = ImageDraw.Draw(pie)
+    box = (SUPERSAMPLE, SUPERSAMPLE, size - SUPERSAMPLE - 1, size - SUPERSAMPLE - 1)
+    # Pillow measures angles clockwise, the pie runs counterclockwise
+    for index in range(num_slices):
+        start = 90 + index * step
+        draw.pieslice(box, -(start + step), -start, fill=FILL, outline=OUTLINE, width=SUPERSAMPLE)
+    image.paste(pie.reduce(SUPERSAMPLE), (CENTER[0] - RADIUS - 1, CENTER[1] - RADIUS - 1))
+
+    image = image.quantize(WEDGE_COLORS, method=Image.Quantize.FASTOCTREE)
+    palette = image.getpalette()[:(WEDGE_COLORS * 3)]
+    palette += [0] * (WEDGE_COLORS * 3 - len(palette))
+    for level in range(TEXT_LEVELS):
+        weight = level / (TEXT_LEVELS - 1)
+        palette += [round(fill + (text - fill) * weight) for fill, text in zip(FILL, TEXT)]
+    image.putpalette(palette)
+    return image
+
+
+def draw_pie(word: str) -> BinaryIO:
+    """
+    Draw the letters of word as equal wedges, counterclockwise from the
+    top, and return the PNG.
+    """
+    step = 360 / len(word)
+    image = get_wedges(len(word)).copy()
+
+    # Labels sit well inside the white wedges, so they are drawn as a
+    # coverage mask and shaded over the fill
+    labels = Image.new('L', (2 * RADIUS, 2 * RADIUS))
+    draw = ImageDraw.Draw(labels)
+    font = get_label_font()
+    for index, letter in enumerate(word):
+        angle = math.radians(90 + (index + 0.5) * step)
+        position = (
+            RADIUS + LABEL_DISTANCE * RADIUS * math.cos(angle),
+            RADIUS - LABEL_DISTANCE * RADIUS * math.sin(angle)
+        )
+        # A stroke stands in for a bold face
+        draw.text(position, letter, fill=255, font=font, anchor='mm', stroke_width=1, stroke_fill=255)
+
+    shades = labels.point([WEDGE_COLORS + round(value * (TEXT_LEVELS - 1) / 255) for value in range(256)])
+    image.paste(
+        shades, (CENTER[0] - RADIUS, CENTER[1] - RADIUS), mask=labels.point(lambda value: 255 if value else 0, '1')
+    )
+
+    fh = BytesIO()
+    image.save(fh, format='PNG', compress_level=1)
+    fh.seek(0)
+    return fh
+
+
+def draw_pie_matplotlib(word: str) -> BinaryIO:
+    """
+    The original matplotlib rendering, kept as a fallback backend.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    sns.set(font_scale=1.2)
+    fig = plt.figure(figsize=(10, 10))
+    try:
+        fig.patch.set_facecolor("red")
+
+        patches, texts = plt.pie(
+            x=len(word) * [100 / len(word)],
+            labels=list(word),
+            colors=["white"],
+            startangle=90,
+            # Bring labels inside the pie
+            labeldistance=0.7,
+            wedgeprops={"edgecolor": "black", 'linewidth': 1, 'linestyle': 'solid', 'antialiased': True}
+        )
+
+        # make each label bold and center-aligned
+        for text in texts:
+            text.set_fontweight('bold')
+            text.set_horizontalalignment('center')
+
+        fh = BytesIO()
+        fig.savefig(fh, format='png')
+    finally:
+        plt.close(fig)
+    fh.seek(0)
+    return fh
+
+
+def get_pie_renderer():
+    return import_string(settings.PUZZLE_PIE_RENDERER)
@@ -1,18 +1,22 @@
 import random
+from typing import Optional
 
 from django.core.validators import ValidationError
 
+from puzzle.common.utils import get_rng
 
-def obfuscate_word(word: str) -> str:
+
+def obfuscate_word(word: str, rng: Optional[random.Random] = None) -> str:
+    rng = get_rng(rng)
 
     def _shift(value: str, index: int):
         return value[index:] + value[:index]
 
-    direction = random.choice(('out', 'in'))
-    pop_letter = random.randint(0, len(word) - 1)
+    direction = rng.choice(('out', 'in'))
+    pop_letter = rng.randint(0, len(word) - 1)
     word = word[:pop_letter] + '?' + word[(pop_letter + 1):]
     word = ''.join(reversed(list(word))) if direction == 'in' else word
-    begin_letter = random.randint(0, len(word) - 1)
+    begin_letter = rng.randint(0, len(word) - 1)
     return _shift(word, begin_letter)
 
 
@@ -0,0 +1,84 @@
+import os
+from functools import lru_cache
+from io import BytesIO
+from typing import BinaryIO, List, Optional
+
+from django.conf import settings
+from PIL import Image, ImageDraw, ImageFont
+
+from puzzle.knight_move import fields as knight_move_fields
+from puzzle.word_finder import fields as word_finder_fields
+from puzzle.word_ladder import fields as word_ladder_fields
+from puzzle.word_square import fields as word_square_fields
+
+
+CELL_SIZE = 100
+FONT_SIZE = 50
+LINE_COLOR = 128
+
+# Distance of a letter from the top left corner of its cell
+LETTER_OFFSET = 25
+LETTER_OFFSETS = {'*': 32}
+
+
+@lru_cache(maxsize=None)
+def get_font() -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(os.path.join(settings.PROJECT_DIR, 'puzzle', 'Arial.ttf'), FONT_SIZE)
+
+
+@lru_cache(maxsize=None)
+def get_grid(num_columns: int, num_rows: int) -> Image.Image:
+    """
+    A blank grid, to be copied rather than drawn for every board.
+    """
+    width = CELL_SIZE * num_columns
+    height = CELL_SIZE * num_rows
+    image = Image.new(mode='L', size=(width + 1, height + 1), color=255)
+
+    draw = ImageDraw.Draw(image)
+    for x in range(0, width + 1, CELL_SIZE):
+        draw.line(((x, 0), (x, height)), fill=LINE_COLOR)
+    for y in range(0, height + 1, CELL_SIZE):
+        draw.line(((0, y), (width, y)), fill=LINE_COLOR)
+    return image
+
+
+@lru_cache(maxsize=None)
+def get_glyph(letter: str) -> Optional[Image.Image]:
+    """
+    The coverage of letter placed in a cell, used as the mask to paste the
+    letter with. None for letters that leave the cell blank.
+    """
+    offset = LETTER_OFFSETS.get(letter, LETTER_OFFSET)
+    glyph = Image.new(mode='L', size=(CELL_SIZE, CELL_SIZE), color=0)
+    ImageDraw.Draw(glyph).text((offset, offset), letter, fill=255, font=get_font())
+    return glyph if glyph.getbbox() else None
+
+
+def draw_grid(rows: List[List[str]], num_columns: int, num_rows: int) -> BinaryIO:
+    image = get_grid(num_columns, num_rows).copy()
+    for y, row in enumerate(rows[:num_rows]):
+        for x, letter in enumerate(row[:num_columns]):
+            glyph = get_glyph(letter)
+            if glyph is not None:
+                image.paste(0, (x * CELL_SIZE, y * CELL_SIZE), mask=glyph)
+
+    fh = BytesIO()
+    image.save(fh, format='PNG')
+    return fh
+
+
+def draw_knight_move(board: knight_move_fields.Board) -> BinaryIO:
+    return draw_grid(board.serialize(), board.num_columns, board.num_rows)
+
+
+def draw_word_finder(board: word_finder_fields.Board, size: int) -> BinaryIO:
+    return draw_grid(board.simple(), size, size)
+
+
+def draw_word_square(board: word_square_fields.Board, size: int) -> BinaryIO:
+    return draw_grid(board.simple(), size, size)
+
+
+def draw_word_ladder(board: word_ladder_fields.Board, num_columns: int, num_rows: int) -> BinaryIO:
+    return draw_grid(board.simple(), num_columns, num_rows)
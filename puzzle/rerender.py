@@ -0,0 +1,135 @@
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Type
+
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models import Q
+
+from puzzle.models import Puzzle
+
+
+CHUNK_SIZE = 100
+
+
+@dataclass
+class RerenderSummary:
+    processed: int = 0
+    rendered: int = 0
+    last_pk: Optional[int] = None
+
+    @property
+    def skipped(self) -> int:
+        return self.processed - self.rendered
+
+    def __str__(self):
+        return f'{self.processed} puzzles processed, {self.rendered} re-rendered, {self.skipped} unchanged'
+
+
+def get_content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def get_stored_hash(puzzle: Puzzle, name: str) -> Optional[str]:
+    if name == 'image' and puzzle.image_hash:
+        return puzzle.image_hash
+    field = getattr(puzzle, name)
+    if not field:
+        return None
+    try:
+        with field.open('rb') as fh:
+            return get_content_hash(fh.read())
+    except FileNotFoundError:
+        return None
+
+
+def render_changes(puzzle: Puzzle) -> Dict[str, bytes]:
+    """
+    Render the images of puzzle and return the ones whose content differs
+    from the stored file.
+    """
+    changes = {}
+    for name, fh in puzzle.render_images().items():
+        data = fh.getvalue()
+        if get_content_hash(data) != get_stored_hash(puzzle, name):
+            changes[name] = data
+    return changes
+
+
+class ImageRerenderer:
+    """
+    Render the images of every puzzle of a model again from its stored
+    board, in a pool of worker processes if asked to. Rows are walked in
+    primary key order in chunks, each chunk is written in one transaction,
+    so that a run can be resumed after the last primary key it reported.
+    """
+
+    def __init__(self, model: Type[Puzzle], chunk_size: int = CHUNK_SIZE, workers: int = 1,
+                 on_chunk: Optional[Callable[[RerenderSummary], None]] = None):
+        self.model = model
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.on_chunk = on_chunk
+        self.fields = [name for name in ('image', 'solution_image') if hasattr(model, name)]
+
+    def run(self, after: Optional[int] = None) -> RerenderSummary:
+        summary = RerenderSummary(last_pk=after)
+        queryset = self.model.objects.exclude(Q(image='') | Q(image__isnull=True)).order_by('pk')
+        if after is not None:
+            queryset = queryset.filter(pk__gt=after)
+
+        executor = None
+        if self.workers > 1:
+            # Children must not share the connection of this process
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('fork')
+            )
+        try:
+            for chunk in self._chunks(queryset):
+                if executor:
+                    changes = list(executor.map(render_changes, chunk))
+                else:
+                    changes = list(map(render_changes, chunk))
+                self._save(chunk, changes, summary)
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+        return summary
+
+    def _chunks(self, queryset) -> Iterator[List[Puzzle]]:
+        puzzles = queryset.iterator(chunk_size=self.chunk_size)
+        while chunk := list(islice(puzzles, self.chunk_size)):
+            yield chunk
+
+    def _save(self, chunk: List[Puzzle], changes: List[Dict[str, bytes]], summary: RerenderSummary):
+        changed = []
+        with transaction.atomic():
+            for puzzle, images in zip(chunk, changes):
+                if not images:
+                    continue
+                for name, data in images.items():
+                    field = getattr(puzzle, name)
+                    old_name = field.name
+                    field.save(os.path.basename(old_name or f'{name}.png'), ContentFile(data), save=False)
+                    if old_name:
+                        # Only remove the old file once the row points elsewhere
+                        transaction.on_commit(partial(field.storage.delete, old_name))
+                    if name == 'image':
+                        puzzle.image_hash = get_content_hash(data)
+                puzzle.payload = puzzle.build_payload()
+                changed.append(puzzle)
+            if changed:
+                self.model.objects.bulk_update(changed, self.fields + ['image_hash', 'payload'])
+
+        summary.processed += len(chunk)
+        summary.rendered += len(changed)
+        summary.last_pk = chunk[-1].pk
+        if self.on_chunk:
+            self.on_chunk(summary)
@@ -0,0 +1,46 @@
+import random
+from typing import Optional
+
+from django.conf import settings
+from django.db import models
+from django.utils.module_loading import import_string
+
+
+class SelectionStrategy:
+
+    def select(self, queryset: models.QuerySet, puzzle_type: str) -> Optional[models.Model]:
+        raise NotImplementedError()
+
+
+class RandomOrderSelection(SelectionStrategy):
+    """
+    Let the database shuffle every puzzle of the type. Simple, but a full
+    scan and sort per call.
+    """
+
+    def select(self, queryset, puzzle_type):
+        return queryset.filter(puzzle_type=puzzle_type).order_by('?').first()
+
+
+class SequenceSelection(SelectionStrategy):
+    """
+    Draw a number from the dense per-type sequence and fetch that puzzle,
+    which costs two index lookups however many puzzles there are.
+    """
+
+    attempts = 3
+
+    def select(self, queryset, puzzle_type):
+        last = queryset.model.objects.last_sequence(puzzle_type)
+        if not last:
+            return None
+        for _ in range(self.attempts):
+            sequence = random.randint(1, last)
+            if obj := queryset.filter(puzzle_type=puzzle_type, sequence=sequence).order_by().first():
+                return obj
+        # A concurrent delete left a gap; fall back rather than fail
+        return RandomOrderSelection().select(queryset, puzzle_type)
+
+
+def get_selection_strategy() -> SelectionStrategy:
+    return import_string(settings.PUZZLE_SELECTION_STRATEGY)()
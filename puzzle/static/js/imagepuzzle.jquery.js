@@ -25,7 +25,7 @@
                         "Content-Type": "application/json"
                     },
                     success: function (res) {
-                        self.data = res.puzzleData.data;
+                        self.data = res.puzzleData.image;
                         self.solution = res.puzzleData.solution;
                         self.updateImage(self.data);
                         self.guessButton.prop('disabled', false);
@@ -40,8 +40,8 @@
             });
         }
 
-        updateImage(data) {
-            this.wrapper.html('<img src="data:image/jpeg;base64,' + data + '" alt="puzzle" width="' + this.imageWidth + '">');
+        updateImage(url) {
+            this.wrapper.html('<img src="' + url + '" alt="puzzle" width="' + this.imageWidth + '">');
         }
 
     }
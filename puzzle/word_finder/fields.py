@@ -1,9 +1,8 @@
-from typing import List, Tuple
-
-import numpy
+from typing import Dict, List, Optional, Tuple
 
 from puzzle.common.fields import Board as BaseBoard
 from puzzle.word_finder.models import Series, Slot
+from puzzle.word_finder.search import PatternMatcher
 
 
 class Board(BaseBoard):
@@ -12,12 +11,23 @@ class Board(BaseBoard):
 
     slots: List[List[Slot]]
 
-    def __init__(self, size: int):
+    def __init__(self, size: int, slots: Optional[List[List[Slot]]] = None):
         self.size = size
-        self.slots = [
+        self.slots = slots if slots is not None else [
             [Slot(row, col) for col in range(self.size)]
             for row in range(self.size)
         ]
+        # The series share the slots of the board, so they follow its letters
+        self._rows = [Series(row) for row in self.slots]
+        self._columns = [Series([row[n] for row in self.slots]) for n in range(self.size)]
+        self._diagonals = []
+        for flipped in (False, True):
+            for n in range(-(self.size - 1), self.size - 1):
+                self._diagonals.append(Series([
+                    self.slots[x][self.size - 1 - (x + n) if flipped else x + n]
+                    for x in range(self.size) if 0 <= x + n < self.size
+                ]))
+        self._series = self._rows + self._columns + self._diagonals
 
     def simple(self):
         return [
@@ -48,58 +58,63 @@ class Board(BaseBoard):
 
     @property
     def series(self):
-        return self.rows + self.columns + self.diagonals
+        return self._series
 
     @property
     def rows(self):
-        return [
-            Series(row)
-            for row in self.slots
-        ]
+        return self._rows
 
     @property
     def columns(self):
-        return [
-            Series(list(numpy.array(self.slots)[:, n]))
-            for n in range(self.size)
-        ]
+        return self._columns
 
     @property
     def diagonals(self):
-        return [
-            Series(list(numpy.diag(numpy.array(self.slots), n)))
-            for n in range(-(self.size - 1), self.size - 1)
-        ]
+        return self._diagonals
 
     def is_valid(self, hints: List[str], solution: str):
-        for word in self.words(hints):
-            for x, y in word:
-                del self[(x, y)]
-        solution_letters = [slot.letter for slot in self.filled()]
-        for letter in solution:
-            try:
-                solution_letters.pop(solution_letters.index(letter))
-            except ValueError:
-                return False
-        if solution_letters:
+        """
+        Whether every hint is on the board and the letters outside of them
+        are those of the solution. Leaves the board as it is.
+        """
+        hints = [hint for hint in hints if hint]
+        located = self.locate(hints)
+        if len(located) != len(set(hints)):
             return False
-        return True
+        used = {cell for cells in located.values() for cell in cells}
+        remainder = [slot.letter for slot in self.filled() if (slot.x, slot.y) not in used]
+        return sorted(remainder) == sorted(solution)
 
     def words(self, hints: List[str]) -> List[List[Tuple[int, int]]]:
-        result = []
+        located = self.locate(hints)
+        return [located[hint] for hint in hints if hint in located]
+
+    def locate(self, hints: List[str]) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        The cells of every hint found on the board, in reading order of the
+        hint, forwards or in reverse. All hints are matched in one pass over
+        the series; the first series holding a hint wins.
+        """
+        patterns: Dict[str, List[Tuple[str, bool]]] = {}
         for hint in hints:
-            for series in self.series:
-                joined = ''.join(slot.letter for slot in series)
-                if (index := joined.find(hint)) != -1:
-                    slots = series[index:(index + len(hint))]
-                    word = []
-                    for slot in slots:
-                        word.append((slot.x, slot.y))
-                    result.append(word)
-                    break
-            else:
-                break
-        return result
+            if hint:
+                patterns.setdefault(hint, []).append((hint, False))
+                patterns.setdefault(hint[::-1], []).append((hint, True))
+        matcher = PatternMatcher(patterns)
+
+        found = {}
+        for number, series in enumerate(self.series):
+            text = ''.join(slot.letter for slot in series)
+            for start, pattern in matcher.search(text):
+                for hint, is_reversed in patterns[pattern]:
+                    key = (number, is_reversed, start)
+                    if hint not in found or key < found[hint][0]:
+                        found[hint] = (key, series[start:(start + len(hint))])
+
+        return {
+            hint: [(slot.x, slot.y) for slot in (slots[::-1] if key[1] else slots)]
+            for hint, (key, slots) in found.items()
+        }
 
     def __getitem__(self, item):
         return self._get_slot(item).letter
@@ -131,6 +146,4 @@ class Board(BaseBoard):
             [Slot(x, y, letter) for y, letter in enumerate(row)]
             for x, row in enumerate(value)
         ]
-        word_finder = cls(len(slots))
-        word_finder.slots = slots
-        return word_finder
+        return cls(len(slots), slots)
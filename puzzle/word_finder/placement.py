@@ -0,0 +1,157 @@
+import random
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterator, List, Optional, Set
+
+import numpy
+
+from puzzle.word_finder.search import PatternMatcher
+
+EMPTY = 0
+
+# How much a shared letter adds to the odds of a placement being picked
+OVERLAP_WEIGHT = 4
+
+# Shuffles of the solution letters tried before the grid is given up on
+FILL_ATTEMPTS = 10
+
+
+@lru_cache(maxsize=None)
+def get_lines(size: int) -> List[numpy.ndarray]:
+    """
+    The flat cell indexes of every row, column and diagonal (both ways)
+    of a size x size grid, at least two cells long.
+    """
+    cells = numpy.arange(size * size).reshape(size, size)
+    flipped = numpy.fliplr(cells)
+    lines = list(cells) + list(cells.T)
+    for offset in range(-(size - 2), size - 1):
+        lines.append(numpy.diagonal(cells, offset))
+        lines.append(numpy.diagonal(flipped, offset))
+    return lines
+
+
+@lru_cache(maxsize=None)
+def get_cell_lines(size: int) -> Dict[int, List[int]]:
+    """
+    The numbers of the lines through every cell of the grid.
+    """
+    cell_lines = {cell: [] for cell in range(size * size)}
+    for number, line in enumerate(get_lines(size)):
+        for cell in line.tolist():
+            cell_lines[cell].append(number)
+    return cell_lines
+
+
+@lru_cache(maxsize=None)
+def get_placements(size: int, length: int) -> numpy.ndarray:
+    """
+    Every way to write a word of length on the grid, forwards and in
+    reverse, as an array of (placements, length) flat cell indexes.
+    """
+    placements = []
+    for line in get_lines(size):
+        for start in range(len(line) - length + 1):
+            cells = line[start:(start + length)]
+            placements.append(cells)
+            placements.append(cells[::-1])
+    if not placements:
+        return numpy.empty((0, length), dtype=numpy.intp)
+    return numpy.array(placements, dtype=numpy.intp)
+
+
+class Grid:
+    """
+    Word finder letters as a flat array of code points, EMPTY for open
+    cells, to score all placements of a word at once. Every word placed
+    occurs on the grid exactly once, forwards or in reverse, so that it
+    can be found again in the one place it was written.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.letters = numpy.full(size * size, EMPTY, dtype=numpy.int32)
+        self.words: List[str] = []
+
+    @property
+    def num_open(self) -> int:
+        return int(numpy.count_nonzero(self.letters == EMPTY))
+
+    def place(self, word: str, rng: random.Random) -> bool:
+        """
+        Write word where it fits, preferring placements that share more
+        letters with the words already on the grid. Return whether it fit.
+        """
+        placements = get_placements(self.size, len(word))
+        if not len(placements):
+            return False
+        codes = numpy.array([ord(letter) for letter in word], dtype=numpy.int32)
+        current = self.letters[placements]
+        matches = current == codes
+        # Already spelled by the letters of other words
+        if matches.all(axis=1).any():
+            return False
+        fits = (matches | (current == EMPTY)).all(axis=1)
+        overlap = matches.sum(axis=1)
+        candidates = numpy.flatnonzero(fits).tolist()
+        weights = (1 + OVERLAP_WEIGHT * overlap[candidates]).tolist()
+        matcher = self._get_matcher(self.words + [word])
+        while candidates:
+            index = rng.choices(range(len(candidates)), weights=weights)[0]
+            cells = placements[candidates[index]]
+            if self._write(cells, codes, matcher, allowed=frozenset(cells.tolist())):
+                self.words.append(word)
+                return True
+            del candidates[index]
+            del weights[index]
+        return False
+
+    def fill(self, word: str, rng: random.Random) -> bool:
+        """
+        Spread the letters of word over the open cells in random order,
+        without spelling any of the placed words again. Return whether
+        that worked out.
+        """
+        cells = numpy.flatnonzero(self.letters == EMPTY).tolist()
+        codes = numpy.array([ord(letter) for letter in word], dtype=numpy.int32)
+        matcher = self._get_matcher(self.words)
+        for _ in range(FILL_ATTEMPTS):
+            rng.shuffle(cells)
+            if self._write(numpy.array(cells, dtype=numpy.intp), codes, matcher):
+                return True
+        return False
+
+    def _get_matcher(self, words: List[str]) -> PatternMatcher:
+        return PatternMatcher(words + [word[::-1] for word in words])
+
+    def _write(self, cells: numpy.ndarray, codes: numpy.ndarray, matcher: PatternMatcher,
+               allowed: Optional[FrozenSet[int]] = None) -> bool:
+        """
+        Write codes to cells unless that spells a word in a place other
+        than allowed. Only lines through cells that were open can hold a
+        new occurrence.
+        """
+        previous = self.letters[cells]
+        self.letters[cells] = codes
+        changed = set(cells[previous == EMPTY].tolist())
+        if any(occurrence != allowed for occurrence in self._occurrences(matcher, changed)):
+            self.letters[cells] = previous
+            return False
+        return True
+
+    def _occurrences(self, matcher: PatternMatcher, changed: Set[int]) -> Iterator[FrozenSet[int]]:
+        lines = get_lines(self.size)
+        cell_lines = get_cell_lines(self.size)
+        numbers = sorted({number for cell in changed for number in cell_lines[cell]})
+        for number in numbers:
+            line = lines[number].tolist()
+            text = ''.join(map(chr, self.letters[line].tolist()))
+            for start, pattern in matcher.search(text):
+                cells = frozenset(line[start:(start + len(pattern))])
+                if cells & changed:
+                    yield cells
+
+    def rows(self, empty: Optional[str] = ' ') -> List[List[str]]:
+        return [
+            [chr(code) if code != EMPTY else empty for code in row]
+            for row in self.letters.reshape(self.size, self.size).tolist()
+        ]
@@ -0,0 +1,55 @@
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+class PatternMatcher:
+    """
+    Aho-Corasick automaton: finds every occurrence of any of the patterns
+    in a text in a single pass over it.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[str]] = [[]]
+        for pattern in set(patterns):
+            if pattern:
+                self._add(pattern)
+        self._link()
+
+    def _add(self, pattern: str):
+        state = 0
+        for letter in pattern:
+            if letter not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][letter] = len(self.goto) - 1
+            state = self.goto[state][letter]
+        self.output[state].append(pattern)
+
+    def _link(self):
+        # Breadth first, so the fail state of a parent is known before its
+        # children are linked
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for letter, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and letter not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(letter, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def search(self, text: str) -> Iterator[Tuple[int, str]]:
+        """
+        Yield the start index and pattern of every match, by end index.
+        """
+        state = 0
+        for index, letter in enumerate(text):
+            while state and letter not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(letter, 0)
+            for pattern in self.output[state]:
+                yield index - len(pattern) + 1, pattern
@@ -0,0 +1,97 @@
+import random
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+
+from Levenshtein import distance
+
+from puzzle.common.index import get_word_index, iter_bits, WordIndex
+from puzzle.common.utils import get_rng
+
+
+WILDCARD = '_'
+
+
+class WordGraph:
+    """
+    Graph of words of a single length, connecting words that differ in
+    exactly one letter.
+
+    Edges are found by bucketing every word under each of its wildcard
+    keys (`_AKE`, `B_KE`, ...): words sharing a bucket are neighbours.
+    """
+
+    index: WordIndex
+
+    nodes: Dict[str, int]
+
+    neighbours: List[List[int]]
+
+    def __init__(self, index: WordIndex):
+        self.index = index
+        self.nodes = {word: node for node, word in enumerate(self.words)}
+        buckets: Dict[str, List[int]] = defaultdict(list)
+        for node, word in enumerate(self.words):
+            for position in range(len(word)):
+                buckets[word[:position] + WILDCARD + word[(position + 1):]].append(node)
+        self.neighbours = [[] for _ in self.words]
+        for bucket in buckets.values():
+            if len(bucket) < 2:
+                continue
+            for node in bucket:
+                self.neighbours[node].extend(other for other in bucket if other != node)
+
+    def __len__(self):
+        return len(self.words)
+
+    @property
+    def words(self) -> List[str]:
+        return self.index.words
+
+    def ladder(self, word: str, max_height: int, rng: Optional[random.Random] = None) -> Optional[List[str]]:
+        """
+        Return a shortest ladder of at most max_height words from word to a
+        random word at the maximum Levenshtein distance, or None.
+        """
+        start = self.nodes[word]
+        size = len(word)
+        # Only words that differ from word in every position can be at the
+        # maximum distance, and the index tells which those are
+        unlike = self.index.all
+        for position, letter in enumerate(word):
+            unlike &= ~self.index.mask(position, letter)
+        candidates = set(iter_bits(unlike))
+        parents = {start: None}
+        queue = deque([(start, 1)])
+        endpoints = []
+        while queue:
+            node, height = queue.popleft()
+            if node in candidates and distance(word, self.words[node]) == size:
+                endpoints.append(node)
+            if height == max_height:
+                continue
+            for neighbour in self.neighbours[node]:
+                if neighbour not in parents:
+                    parents[neighbour] = node
+                    queue.append((neighbour, height + 1))
+
+        if not endpoints:
+            return None
+
+        node = get_rng(rng).choice(endpoints)
+        path = []
+        while node is not None:
+            path.append(self.words[node])
+            node = parents[node]
+        return list(reversed(path))
+
+
+_graphs: Dict[int, WordGraph] = {}
+
+
+def get_word_graph(size: int) -> WordGraph:
+    index = get_word_index(size)
+    graph = _graphs.get(size)
+    if graph is None or graph.index is not index:
+        graph = WordGraph(index)
+        _graphs[size] = graph
+    return graph
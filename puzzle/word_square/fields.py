@@ -1,6 +1,4 @@
-from typing import List
-
-import numpy
+from typing import Dict, List, Optional, Tuple
 
 from puzzle.common.fields import Board as BaseBoard
 from puzzle.word_square.models import create_series, Series, SeriesType, Slot
@@ -12,12 +10,21 @@ class Board(BaseBoard):
 
     slots: List[Series]
 
-    def __init__(self, size: int):
+    def __init__(self, size: int, slots: Optional[List[List[Slot]]] = None):
         self.size = size
-        self.slots = [
-            create_series([Slot(row, col) for col in range(self.size)], SeriesType.ROW)
-            for row in range(self.size)
+        if slots is None:
+            slots = [[Slot(row, col) for col in range(self.size)] for row in range(self.size)]
+        self.slots = [create_series(row, SeriesType.ROW) for row in slots]
+        # The series share the slots of the board, so they follow its letters
+        self._columns = [
+            create_series([row[n] for row in self.slots], SeriesType.COLUMN)
+            for n in range(self.size)
         ]
+        self._series = self.slots + self._columns
+        self._related: Dict[Tuple[int, int], List[Series]] = {}
+        for series in self._series:
+            for slot in series:
+                self._related.setdefault((slot.x, slot.y), []).append(series)
 
     def clone(self):
         return Board.deserialize(self.serialize())
@@ -43,22 +50,19 @@ class Board(BaseBoard):
         ]
 
     def related_series(self, slot: Slot) -> List[Series]:
-        return list(filter(lambda s: slot in s, self.series))
+        return self._related.get((slot.x, slot.y), [])
 
     @property
     def series(self):
-        return self.rows + self.columns
+        return self._series
 
     @property
     def rows(self):
-        return self.slots[:]
+        return self.slots
 
     @property
     def columns(self):
-        return [
-            create_series(list(numpy.array(self.slots)[:, n]), SeriesType.COLUMN)
-            for n in range(self.size)
-        ]
+        return self._columns
 
     def is_valid(self):
         return len(self.open()) == 0
@@ -93,6 +97,4 @@ class Board(BaseBoard):
             [Slot(x, y, letter) for y, letter in enumerate(row)]
             for x, row in enumerate(value)
         ]
-        word_finder = cls(len(slots))
-        word_finder.slots = slots
-        return word_finder
+        return cls(len(slots), slots)
@@ -34,3 +34,13 @@ def create_series(initlist: List[Slot], series_type: SeriesType) -> Series:
     series = Series(initlist)
     series.series_type = series_type
     return series
+
+
+@dataclass
+class SolverStats:
+    nodes: int = 0
+    backtracks: int = 0
+
+    def add(self, other: 'SolverStats'):
+        self.nodes += other.nodes
+        self.backtracks += other.backtracks
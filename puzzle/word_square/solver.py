@@ -0,0 +1,168 @@
+import math
+import random
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from puzzle.common.index import WordIndex
+from puzzle.common.utils import get_rng
+from puzzle.word_square.exceptions import WordSquareCreateError
+from puzzle.word_square.models import SolverStats
+
+
+MAX_NODES = 20000
+
+# Below this many candidates it is cheaper to read the letters off the
+# words themselves than to intersect a bitset per letter.
+SELECT_LIMIT = 256
+
+NOISE = 1.0
+
+Cell = Tuple[int, int]
+
+Domains = Dict[Cell, FrozenSet[str]]
+
+
+class WordSquareSolver:
+    """
+    Fill a square where every row and every column is a dictionary word.
+
+    Each cell keeps the set of letters still possible there. Slots (rows
+    and columns) are filled most-constrained first and every placement is
+    followed by propagation: a slot's candidates are the words compatible
+    with the domains of its cells, and each cell's domain is narrowed to
+    the letters its candidates still use.
+    """
+
+    def __init__(self, index: WordIndex, size: int, max_nodes: int = MAX_NODES,
+                 stats: Optional[SolverStats] = None, rng: Optional[random.Random] = None):
+        self.index = index
+        self.size = size
+        self.max_nodes = max_nodes
+        self.stats = stats if stats is not None else SolverStats()
+        self.rng = get_rng(rng)
+        # Bitsets looked up during this solve; an index over a snapshot
+        # converts them on every lookup
+        self._masks: Dict[Tuple[int, str], int] = {}
+        self._allowed: Dict[Tuple[int, FrozenSet[str]], int] = {}
+        self.slots = [
+            [(row, col) for col in range(size)]
+            for row in range(size)
+        ] + [
+            [(row, col) for row in range(size)]
+            for col in range(size)
+        ]
+
+    def solve(self) -> List[List[str]]:
+        letters = frozenset(letter for _, letter in self.index.masks)
+        domains = {
+            cell: letters
+            for cells in self.slots[:self.size]
+            for cell in cells
+        }
+        candidates = self._propagate(domains, {}, set(range(len(self.slots))))
+        if candidates is None or (domains := self._search(domains, candidates)) is None:
+            raise WordSquareCreateError()
+        return [
+            [next(iter(domains[(row, col)])) for col in range(self.size)]
+            for row in range(self.size)
+        ]
+
+    def _crossing(self, slot: int, cell: Cell) -> int:
+        row, col = cell
+        return self.size + col if slot < self.size else row
+
+    def _mask(self, position: int, letter: str) -> int:
+        key = (position, letter)
+        if (mask := self._masks.get(key)) is None:
+            mask = self._masks[key] = self.index.mask(position, letter)
+        return mask
+
+    def _allowed_mask(self, position: int, domain: FrozenSet[str]) -> int:
+        key = (position, domain)
+        if (allowed := self._allowed.get(key)) is None:
+            allowed = 0
+            for letter in domain:
+                allowed |= self._mask(position, letter)
+            self._allowed[key] = allowed
+        return allowed
+
+    def _candidates(self, slot: int, domains: Domains) -> int:
+        result = self.index.all
+        for position, cell in enumerate(self.slots[slot]):
+            result &= self._allowed_mask(position, domains[cell])
+            if not result:
+                break
+        return result
+
+    def _propagate(self, domains: Domains, candidates: Dict[int, int],
+                   queue: Set[int]) -> Optional[Dict[int, int]]:
+        candidates = dict(candidates)
+        while queue:
+            slot = queue.pop()
+            mask = self._candidates(slot, domains)
+            if not mask:
+                return None
+            if mask == candidates.get(slot):
+                continue
+            candidates[slot] = mask
+            words = self.index.select(mask) if mask.bit_count() <= SELECT_LIMIT else None
+            for position, cell in enumerate(self.slots[slot]):
+                domain = domains[cell]
+                if len(domain) == 1:
+                    continue
+                if words is not None:
+                    reduced = domain & {word[position] for word in words}
+                else:
+                    reduced = frozenset(
+                        letter for letter in domain
+                        if mask & self._mask(position, letter)
+                    )
+                if len(reduced) != len(domain):
+                    domains[cell] = reduced
+                    queue.add(self._crossing(slot, cell))
+        return candidates
+
+    def _order(self, slot: int, domains: Domains, candidates: Dict[int, int]) -> List[str]:
+        # Least constraining words first: score each word by how many words
+        # remain in the crossing slots, with some noise so that repeated
+        # runs produce different squares.
+        weights = []
+        for position, cell in enumerate(self.slots[slot]):
+            crossing = self._crossing(slot, cell)
+            crossing_position = cell[0] if slot < self.size else cell[1]
+            weights.append({
+                letter: math.log(
+                    (candidates[crossing] & self._mask(crossing_position, letter)).bit_count() + 1
+                )
+                for letter in domains[cell]
+            })
+        return sorted(
+            self.index.select(candidates[slot]),
+            key=lambda word: -sum(
+                weights[position][letter] + self.rng.random() * NOISE
+                for position, letter in enumerate(word)
+            )
+        )
+
+    def _search(self, domains: Domains, candidates: Dict[int, int]) -> Optional[Domains]:
+        open_slots = [
+            slot for slot, cells in enumerate(self.slots)
+            if any(len(domains[cell]) > 1 for cell in cells)
+        ]
+        if not open_slots:
+            return domains
+
+        slot = min(open_slots, key=lambda s: candidates[s].bit_count())
+        for word in self._order(slot, domains, candidates):
+            self.stats.nodes += 1
+            if self.stats.nodes > self.max_nodes:
+                raise WordSquareCreateError()
+            placed = dict(domains)
+            queue = {slot}
+            for position, cell in enumerate(self.slots[slot]):
+                placed[cell] = frozenset(word[position])
+                queue.add(self._crossing(slot, cell))
+            if (propagated := self._propagate(placed, candidates, queue)) is not None:
+                if (result := self._search(placed, propagated)) is not None:
+                    return result
+            self.stats.backtracks += 1
+        return None
@@ -145,3 +145,18 @@ REST_FRAMEWORK = {
         # Any other parsers
     ),
 }
+
+# Strategy used by the API to pick a random puzzle of a type, see puzzle.selection
+PUZZLE_SELECTION_STRATEGY = env.str('PUZZLE_SELECTION_STRATEGY', 'puzzle.selection.SequenceSelection')
+
+# When set, puzzle images are handed off to the front server with an
+# X-Accel-Redirect to this location followed by the file name
+PUZZLE_IMAGE_ACCEL_REDIRECT = env.str('PUZZLE_IMAGE_ACCEL_REDIRECT', '')
+
+# Dictionary snapshot built by the build_word_snapshot command. When set,
+# puzzles are generated from this file instead of the Word table.
+PUZZLE_WORD_SNAPSHOT = env.str('PUZZLE_WORD_SNAPSHOT', '')
+
+# Draws the pie slice images; puzzle.pie_slice.rendering.draw_pie_matplotlib
+# is the slower matplotlib fallback
+PUZZLE_PIE_RENDERER = env.str('PUZZLE_PIE_RENDERER', 'puzzle.pie_slice.rendering.draw_pie')
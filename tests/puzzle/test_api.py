@@ -1,8 +1,11 @@
 import json
+from unittest import mock
 
+from django.test import override_settings
 from django.test.testcases import TestCase
 
-from puzzle.models import KnightMove
+from puzzle.models import KnightMove, Puzzle
+from puzzle.selection import random
 
 
 class TestPuzzleView(TestCase):
@@ -15,3 +18,87 @@ class TestPuzzleView(TestCase):
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.content)
         self.assertEqual(data['puzzleData']['solution'], 'PASSWORD')
+        self.assertEqual(data['puzzleData']['image'], f'/api/images/{puzzle.image_hash}.png')
+
+    def test_get_empty(self):
+        response = self.client.get('/api/puzzles/knight_move/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_selects_by_sequence(self):
+        puzzles = []
+        for word in ('password', 'woonzorg', 'kattenbe'):
+            puzzle = KnightMove(word=word)
+            puzzle.save()
+            puzzles.append(puzzle)
+        self.assertEqual([puzzle.sequence for puzzle in puzzles], [1, 2, 3])
+
+        with mock.patch.object(random, 'randint', return_value=2):
+            response = self.client.get('/api/puzzles/knight_move/')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual(data['puzzleData']['solution'], 'WOONZORG')
+
+    def test_delete_fills_sequence_gap(self):
+        for word in ('password', 'woonzorg', 'kattenbe', 'doorgang'):
+            KnightMove(word=word).save()
+        KnightMove.objects.filter(word__in=['PASSWORD', 'WOONZORG']).delete()
+        self.assertEqual(
+            sorted(Puzzle.objects.values_list('sequence', flat=True)),
+            [1, 2]
+        )
+
+    def test_get_num_queries(self):
+        KnightMove(word='password').save()
+        # Highest sequence, then the puzzle with its subclass joined
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/puzzles/knight_move/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_without_payload(self):
+        puzzle = KnightMove(word='password')
+        puzzle.save()
+        Puzzle.objects.update(payload='')
+        response = self.client.get('/api/puzzles/knight_move/')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual(data['puzzleData']['solution'], 'PASSWORD')
+        self.assertEqual(response.content.decode(), puzzle.payload)
+
+
+class TestPuzzleImageView(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.puzzle = KnightMove(word='password')
+        self.puzzle.save()
+
+    def test_get(self):
+        response = self.client.get(self.puzzle.get_image_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertEqual(response['ETag'], f'"{self.puzzle.image_hash}"')
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        with self.puzzle.image.open('rb') as fh:
+            self.assertEqual(b''.join(response.streaming_content), fh.read())
+
+    def test_get_not_modified(self):
+        response = self.client.get(
+            self.puzzle.get_image_url(),
+            HTTP_IF_NONE_MATCH=f'"{self.puzzle.image_hash}"'
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], f'"{self.puzzle.image_hash}"')
+
+    def test_get_not_found(self):
+        response = self.client.get('/api/images/unknown.png')
+        self.assertEqual(response.status_code, 404)
+
+        # A matching ETag does not make an unknown image exist
+        response = self.client.get('/api/images/unknown.png', HTTP_IF_NONE_MATCH='"unknown"')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(PUZZLE_IMAGE_ACCEL_REDIRECT='/protected/')
+    def test_get_accel_redirect(self):
+        response = self.client.get(self.puzzle.get_image_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected/' + self.puzzle.image.name)
@@ -1,28 +1,23 @@
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+from io import StringIO
 from unittest import mock
 
-from django.core.management import call_command
+from django.core.management import call_command, CommandError
 from django.test.testcases import TestCase
 
-from puzzle.models import WordLadder, WordSquare
+from puzzle.common.snapshot import WordSnapshot
+from puzzle.models import KnightMove, Puzzle, Word, WordLadder, WordSquare
 from puzzle.word_ladder.models import Slot as WordLadderSlot
-from puzzle.word_square.models import Slot as WordSquareSlot
-from puzzle.word_square.utils import random
 
 from tests.puzzle.factories import WordFactory
 
 
 class TestCommands(TestCase):
 
-    @mock.patch.object(random, 'choice')
-    @mock.patch.object(random, 'randint')
-    def test_generate_word_squares(self, mock_int, mock_choice):
-        mock_int.side_effect = [3, 0, 2, 0, 1, 0, 0, 0, 0]
-        mock_choice.side_effect = [
-            WordSquareSlot(0, 0),
-            WordSquareSlot(1, 1),
-            WordSquareSlot(2, 2),
-            WordSquareSlot(3, 3)
-        ]
+    def test_generate_word_squares(self):
         WordFactory(word='ABAC')
         WordFactory(word='LOBE')
         WordFactory(word='PREP')
@@ -32,16 +27,7 @@ class TestCommands(TestCase):
         WordFactory(word='ABED')
         WordFactory(word='CEPE')
 
-        def mock_order(instance, *args):
-            if instance.query.is_sliced:
-                raise TypeError("Cannot reorder a query once a slice has been taken.")
-            obj = instance._chain()
-            obj.query.clear_ordering(force=True, clear_default=False)
-            obj.query.add_ordering('word')
-            return obj
-
-        with mock.patch('django.db.models.query.QuerySet.order_by', mock_order):
-            call_command('generate_word_squares', 4, 1)
+        call_command('generate_word_squares', 4, 1, seed=1)
 
         word_squares = WordSquare.objects.all()
         self.assertEqual(len(word_squares), 1)
@@ -49,22 +35,49 @@ class TestCommands(TestCase):
         self.assertEqual(
             word_square.board.serialize(),
             [
-                [" ", "B", "A", "C"], ["L", " ", "B", "E"], ["P", "R", " ", "P"], ["S", "A", "D", " "]
+                ["A", "L", " ", " "], [" ", "O", "R", "A"], [" ", "B", "E", "D"], ["C", "E", "P", "E"]
             ]
         )
         self.assertEqual(
             word_square.solution.serialize(),
             [
 
-                ["A", "B", "A", "C"], ["L", "O", "B", "E"], ["P", "R", "E", "P"], ["S", "A", "D", "E"]
+                ["A", "L", "P", "S"], ["B", "O", "R", "A"], ["A", "B", "E", "D"], ["C", "E", "P", "E"]
             ]
         )
         self.assertIsNotNone(word_square.image)
         self.assertIsNotNone(word_square.solution_image)
 
-    @mock.patch.object(random, 'choice')
-    def test_generate_word_ladders(self, mock_choice):
-        mock_choice.side_effect = ['QUIZ', 'POOL']
+    def test_generate_word_squares_with_workers(self):
+        for word in ['ABAC', 'LOBE', 'PREP', 'SADE', 'ALPS', 'BORA', 'ABED', 'CEPE']:
+            WordFactory(word=word)
+
+        output = StringIO()
+        with redirect_stdout(output):
+            call_command('generate_word_squares', 4, 3, workers=2, seed=1, batch_size=2)
+
+        word_squares = WordSquare.objects.all()
+        self.assertEqual(len(word_squares), 3)
+        self.assertTrue(all(word_square.solution.is_valid() for word_square in word_squares))
+        # The solver stats of the workers add up
+        lines = output.getvalue().splitlines()
+        solved = [line.split() for line in lines if line.startswith('Solved in')]
+        self.assertEqual(len(solved), 3)
+        nodes = sum(int(line[2]) for line in solved)
+        self.assertGreaterEqual(nodes, 3)
+        self.assertIn(f'{nodes} nodes, ', lines[-1])
+
+    def test_generate_word_squares_without_solution(self):
+        for word in ['ABAC', 'LOBE', 'PREP', 'ALPS', 'BORA', 'ABED', 'CEPE']:
+            WordFactory(word=word)
+
+        output = StringIO()
+        with self.assertRaises(CommandError), redirect_stdout(output):
+            call_command('generate_word_squares', 4, 1, max_attempts=3)
+        self.assertEqual(WordSquare.objects.count(), 0)
+        self.assertEqual(output.getvalue().count('Gave up after'), 3)
+
+    def test_generate_word_ladders(self):
         WordFactory(word='POOL')
         WordFactory(word='COOL')
         WordFactory(word='COOK')
@@ -73,16 +86,7 @@ class TestCommands(TestCase):
         WordFactory(word='BOAT')
         WordFactory(word='BRAT')
 
-        def mock_order(instance, *args):
-            if instance.query.is_sliced:
-                raise TypeError("Cannot reorder a query once a slice has been taken.")
-            obj = instance._chain()
-            obj.query.clear_ordering(force=True, clear_default=False)
-            obj.query.add_ordering('word')
-            return obj
-
-        with mock.patch('django.db.models.query.QuerySet.order_by', mock_order):
-            call_command('generate_word_ladders', 4, 1)
+        call_command('generate_word_ladders', 4, 1, seed=5)
 
         word_ladders = WordLadder.objects.all()
         self.assertEqual(len(word_ladders), 1)
@@ -103,3 +107,153 @@ class TestCommands(TestCase):
         )
         self.assertIsNotNone(word_ladder.image)
         self.assertIsNotNone(word_ladder.solution_image)
+
+    def test_generate_word_ladders_without_ladder(self):
+        WordFactory(word='POOL')
+        WordFactory(word='COOL')
+
+        with self.assertRaises(CommandError):
+            call_command('generate_word_ladders', 4, 1)
+
+    def test_build_payloads(self):
+        puzzle = KnightMove(word='password')
+        puzzle.save()
+        payload = puzzle.payload
+        Puzzle.objects.update(payload='')
+
+        call_command('build_payloads')
+
+        puzzle.refresh_from_db()
+        self.assertEqual(puzzle.payload, payload)
+
+    def test_import_words(self):
+        WordFactory(word='POOL')
+        with tempfile.NamedTemporaryFile('w', suffix='.txt') as fh:
+            fh.write('pool\nCool\ncook\r\n\nCOOL\nbook\nabc\nbrat\n')
+            fh.flush()
+
+            output = StringIO()
+            with redirect_stdout(output):
+                call_command('import_words', fh.name, batch_size=2)
+
+        self.assertEqual(
+            list(Word.objects.values_list('word', flat=True)),
+            ['BOOK', 'BRAT', 'COOK', 'COOL', 'POOL']
+        )
+        self.assertEqual(Word.objects.get(word='BRAT').letter_3, 'T')
+        self.assertIn('8 lines read, 4 words written', output.getvalue())
+        self.assertIn('4 words imported', output.getvalue())
+
+    def test_build_word_snapshot(self):
+        WordFactory(word='POOL')
+        WordFactory(word='COOL')
+        WordFactory(word='BOATS')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'words.snapshot')
+
+        output = StringIO()
+        with redirect_stdout(output):
+            call_command('build_word_snapshot', path)
+
+        self.assertIn('3 words written', output.getvalue())
+        snapshot = WordSnapshot(path)
+        self.assertEqual(list(snapshot.index(4).words), ['COOL', 'POOL'])
+        self.assertEqual(list(snapshot.index(5).words), ['BOATS'])
+
+    def test_benchmark_generators(self):
+        WordFactory(word='POOL')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        output = os.path.join(directory.name, 'results.json')
+        budget = os.path.join(directory.name, 'budget.json')
+        with open(budget, 'w') as fh:
+            json.dump({'generate_word_ladder': {'cold_queries': 1, 'queries_per_run': 0}}, fh)
+
+        # No sample boards are generated for draw cases that do not run
+        with mock.patch('puzzle.knight_move.utils.generate_knight_move') as mock_generate:
+            call_command(
+                'benchmark_generators', words_per_size=200, runs=2, case=['generate_word_ladder', 'obfuscate_word'],
+                output=output, budget=budget
+            )
+        mock_generate.assert_not_called()
+
+        with open(output) as fh:
+            results = json.load(fh)['results']
+        self.assertEqual([result['name'] for result in results], ['obfuscate_word', 'generate_word_ladder'])
+        self.assertEqual(results[1]['cold_queries'], 1)
+        self.assertEqual(results[1]['queries_per_run'], 0)
+        self.assertEqual(list(Word.objects.values_list('word', flat=True)), ['POOL'])
+
+        with open(budget, 'w') as fh:
+            json.dump({'generate_word_ladder': {'cold_queries': 0}}, fh)
+        with self.assertRaises(CommandError):
+            call_command('benchmark_generators', words_per_size=200, runs=2, case=['generate_word_ladder'],
+                         budget=budget)
+
+    def test_benchmark_dictionary(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        dictionary = os.path.join(directory.name, 'words.txt')
+        with open(dictionary, 'w') as fh:
+            fh.write('\n'.join(['POOL', 'COOL', 'BOOK', 'COOK']))
+
+        call_command('benchmark_generators', dictionary=dictionary, runs=1, case=['generate_word_ladder'])
+        for case, size in [('draw_pie_slice', 9), ('generate_knight_move', 8)]:
+            with self.assertRaisesMessage(CommandError, f'no words of {size} letters'):
+                call_command('benchmark_generators', dictionary=dictionary, runs=1, case=[case])
+
+    def test_benchmark_startup(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        output = os.path.join(directory.name, 'results.json')
+        call_command('benchmark_generators', words_per_size=10, runs=1, case=['django_setup'], output=output)
+
+        with open(output) as fh:
+            results = json.load(fh)['results']
+        self.assertEqual(results[0]['name'], 'django_setup')
+        self.assertEqual(results[0]['success_rate'], 1)
+
+    def test_rerender_images(self):
+        word_square = WordSquare(size=4)
+        word_square.import_puzzle(words=['ALPS', 'BORA', 'ABED', 'CEPE'])
+        word_square.save()
+        KnightMove(word='password').save()
+        image_hash = word_square.image_hash
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        state = os.path.join(directory.name, 'state.json')
+
+        call_command('rerender_images', type=['word_square'], state=state)
+        word_square.refresh_from_db()
+        self.assertEqual(word_square.image_hash, image_hash)
+        # A finished run leaves nothing to resume
+        self.assertFalse(os.path.exists(state))
+
+        # A stale hash and a changed solution image are rendered again
+        old_name = word_square.solution_image.name
+        WordSquare.objects.filter(pk=word_square.pk).update(image_hash='stale')
+        with word_square.solution_image.open('wb') as fh:
+            fh.write(b'stale')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('rerender_images', type=['word_square', 'knight_move'], workers=2)
+        word_square.refresh_from_db()
+        self.assertEqual(word_square.image_hash, image_hash)
+        self.assertNotEqual(word_square.solution_image.name, old_name)
+        self.assertFalse(word_square.solution_image.storage.exists(old_name))
+
+        # Resumes after the last processed pk of an interrupted run
+        with open(state, 'w') as fh:
+            json.dump({'word_square': word_square.pk, 'knight_move': 0}, fh)
+        WordSquare.objects.filter(pk=word_square.pk).update(image_hash='stale')
+        call_command('rerender_images', type=['word_square'], state=state)
+        word_square.refresh_from_db()
+        self.assertEqual(word_square.image_hash, 'stale')
+        with open(state) as fh:
+            self.assertEqual(json.load(fh), {'knight_move': 0})
+
+        call_command('rerender_images', type=['word_square', 'knight_move'], state=state)
+        word_square.refresh_from_db()
+        self.assertEqual(word_square.image_hash, image_hash)
+        self.assertFalse(os.path.exists(state))
@@ -1,35 +1,148 @@
+import random
 from unittest import mock
 
 from django.core.validators import ValidationError
+from django.db import IntegrityError
+from django.test import override_settings
 from django.test.testcases import TestCase
+from PIL import Image
 
-from puzzle.knight_move.utils import random
-from puzzle.models import KnightMove, PieSlice, WordFinder, WordLadder, WordSquare
-from puzzle.word_finder.models import Slot
+from puzzle.common.fields import LazyBoard
+from puzzle.knight_move.fields import Board as KnightMoveBoard
+from puzzle.models import (
+    KnightMove, PieSlice, Puzzle, PuzzleQuerySet, SEQUENCE_ATTEMPTS, WordFinder, WordLadder, WordSquare
+)
 from puzzle.word_ladder.exceptions import WordLadderCreateError
 from puzzle.word_ladder.models import Slot as WordLadderSlot
 from puzzle.word_square.exceptions import WordSquareCreateError
-from puzzle.word_square.models import Slot as WordSquareSlot
 from tests.puzzle.factories import WordFactory
 
 
-class TestKnightMove(TestCase):
+class TestPuzzle(TestCase):
+
+    def test_select_subclasses(self):
+        knight_move = KnightMove(word='password')
+        knight_move.save()
+        pie_slice = PieSlice(word='kattenbel')
+        pie_slice.save()
+
+        with self.assertNumQueries(1):
+            puzzles = list(Puzzle.objects.select_subclasses().order_by('pk'))
+            self.assertEqual(puzzles, [knight_move, pie_slice])
+            self.assertIsInstance(puzzles[0], KnightMove)
+            self.assertEqual(puzzles[0].word, 'PASSWORD')
+            self.assertEqual(puzzles[0].board.serialize(), knight_move.board.serialize())
+            self.assertIsInstance(puzzles[1], PieSlice)
+            self.assertEqual(puzzles[1].obfuscated_word, pie_slice.obfuscated_word)
+            self.assertEqual(puzzles[1].puzzle_type, Puzzle.PuzzleType.PIE_SLICE)
+
+    def test_get_narrow(self):
+        knight_move = KnightMove(word='password')
+        knight_move.save()
+
+        with self.assertNumQueries(1):
+            puzzle = Puzzle.objects.get_narrow(knight_move.pk)
+        self.assertIsInstance(puzzle, KnightMove)
+        self.assertEqual(Puzzle.objects.get(pk=knight_move.pk).narrow(), knight_move)
+
+    def test_save_image_hash(self):
+        knight_move = KnightMove(word='password')
+        knight_move.save()
+        image_hash = knight_move.image_hash
+        self.assertEqual(len(image_hash), 64)
+
+        # Only a new image is hashed again
+        with mock.patch.object(Puzzle, 'compute_image_hash') as mock_hash:
+            knight_move.save()
+            KnightMove.objects.get().save()
+        mock_hash.assert_not_called()
+
+        knight_move = KnightMove.objects.get()
+        with mock.patch.object(Puzzle, 'compute_image_hash', return_value='new') as mock_hash:
+            knight_move.generate(random.Random(0))
+            knight_move.save()
+        mock_hash.assert_called_once()
+        self.assertEqual(KnightMove.objects.get().image_hash, 'new')
+
+    def test_save_sequence_clash(self):
+        KnightMove(word='password').save()
+        knight_move = KnightMove(word='keyboard')
+        # Another save took the number in between
+        with mock.patch.object(PuzzleQuerySet, 'next_sequence', side_effect=[1, 2]):
+            knight_move.save()
+        self.assertEqual(knight_move.sequence, 2)
+        self.assertEqual(KnightMove.objects.count(), 2)
+
+        with mock.patch.object(PuzzleQuerySet, 'next_sequence', return_value=1) as mock_next:
+            with self.assertRaises(IntegrityError):
+                KnightMove(word='mainland').save()
+        self.assertEqual(mock_next.call_count, SEQUENCE_ATTEMPTS)
+
+        # Other clashes are not retried
+        with mock.patch.object(PuzzleQuerySet, 'next_sequence', return_value=3) as mock_next:
+            with self.assertRaises(IntegrityError):
+                KnightMove(word='password').save()
+        self.assertEqual(mock_next.call_count, 1)
+        self.assertEqual(KnightMove.objects.count(), 2)
+
+
+class TestBoardField(TestCase):
+
+    def test_lazy_board(self):
+        KnightMove(word='password').save()
+        puzzle = KnightMove.objects.get()
+        self.assertIsInstance(puzzle.board, LazyBoard)
+        self.assertFalse(puzzle.board.is_loaded)
+
+        with mock.patch.object(KnightMoveBoard, 'deserialize') as mock_deserialize:
+            puzzle.save()
+        mock_deserialize.assert_not_called()
+        self.assertFalse(puzzle.board.is_loaded)
+
+        self.assertEqual(puzzle.board[(1, 1)].letter, '*')
+        self.assertTrue(puzzle.board.is_loaded)
+        self.assertTrue(puzzle.board.is_valid('PASSWORD'))
+
+    def test_lazy_board_changed(self):
+        KnightMove(word='password').save()
+        puzzle = KnightMove.objects.get()
+        puzzle.board[(1, 1)].letter = '#'
+        puzzle.save()
+        self.assertEqual(KnightMove.objects.get().board.serialize()[1][1], '#')
 
-    @mock.patch.object(random, 'randint')
-    def test_generate(self, mock_int):
+    def test_compact_storage(self):
+        KnightMove(word='password').save()
+        raw = KnightMove.objects.get().board.raw
+        self.assertTrue(raw.startswith('3x3:'))
+        self.assertEqual(len(raw), 4 + 9)
 
-        def mock_choice(slots):
-            return slots[0]
+    def test_deferred_boards(self):
+        for word in ('password', 'absolute', 'marathon'):
+            KnightMove(word=word).save()
+
+        with self.assertNumQueries(2):
+            puzzles = list(KnightMove.objects.defer('board').order_by('word'))
+            boards = [puzzle.board for puzzle in puzzles]
+        self.assertEqual([board[(1, 1)].letter for board in boards], ['*', '*', '*'])
+        self.assertTrue(puzzles[0].board.is_valid('ABSOLUTE'))
+        self.assertTrue(puzzles[2].board.is_valid('PASSWORD'))
+
+        puzzle = KnightMove.objects.defer('board').get(word='MARATHON')
+        with self.assertNumQueries(1):
+            self.assertTrue(puzzle.board.is_valid('MARATHON'))
+
+
+class TestKnightMove(TestCase):
 
-        mock_int.return_value = 1
-        puzzle = KnightMove(word='password')
+    def test_generate(self):
+        puzzle = KnightMove(word='PASSWORD')
         puzzle.full_clean(exclude=('puzzle_type',))
-        with mock.patch.object(random, 'choice', mock_choice):
-            puzzle.save()
+        puzzle.generate(random.Random(1))
+        puzzle.save()
         self.assertEqual(puzzle.board.serialize(), [
-            ['S', 'P', 'O'],
-            ['R', '*', 'S'],
-            ['A', 'W', 'D'],
+            ['R', 'S', 'P'],
+            ['A', '*', 'O'],
+            ['W', 'D', 'S'],
         ])
         self.assertIsNotNone(puzzle.image)
 
@@ -41,17 +154,28 @@ class TestKnightMove(TestCase):
 
 class TestPieSlice(TestCase):
 
-    @mock.patch.object(random, 'randint')
-    @mock.patch.object(random, 'choice')
-    def test_generate(self, mock_choice, mock_int):
-        mock_int.side_effect = [3, 6]
-        mock_choice.return_value = 'out'
-        puzzle = PieSlice(word='foobarqux')
+    def test_generate(self):
+        puzzle = PieSlice(word='FOOBARQUX')
         puzzle.full_clean(exclude=('obfuscated_word', 'puzzle_type',))
+        puzzle.generate(random.Random(1))
         puzzle.save()
-        self.assertEqual(puzzle.obfuscated_word, 'QUXFOO?AR')
+        self.assertEqual(puzzle.obfuscated_word, 'ARQUXF?OB')
         self.assertIsNotNone(puzzle.image)
 
+    def test_draw_image(self):
+        image = Image.open(PieSlice.draw_image('ARQUXF?OB'))
+        self.assertEqual(image.size, (1000, 1000))
+        image = image.convert('RGB')
+        self.assertEqual(image.getpixel((10, 10)), (255, 0, 0))
+        self.assertEqual(image.getpixel((600, 500)), (255, 255, 255))
+        self.assertEqual(image.getpixel((512, 197)), (0, 0, 0))
+
+    @override_settings(PUZZLE_PIE_RENDERER='puzzle.pie_slice.rendering.draw_pie_matplotlib')
+    def test_draw_image_matplotlib(self):
+        image = Image.open(PieSlice.draw_image('ARQUXF?OB'))
+        self.assertEqual(image.size, (1000, 1000))
+        self.assertEqual(image.convert('RGB').getpixel((10, 10)), (255, 0, 0))
+
     def test_generate_invalid_length(self):
         puzzle = PieSlice(word='foobar')
         with self.assertRaises(ValidationError):
@@ -61,68 +185,23 @@ class TestPieSlice(TestCase):
 class TestWordFinder(TestCase):
 
     def test_generate(self):
-
-        def mock_shuffle(val):
-            if isinstance(val, list) and all(isinstance(v, str) for v in val):
-                return ['LOW', 'CRY', 'BEFORE']
-            elif isinstance(val, list) and all(isinstance(v, list) for v in val):
-                if mock_shuffle.call_count == 0:
-                    return [
-                        [Slot(x=0, y=0, letter=' '), Slot(x=1, y=0, letter=' '), Slot(x=2, y=0, letter=' ')],
-                        [Slot(x=0, y=0, letter=' '), Slot(x=1, y=1, letter=' '), Slot(x=2, y=2, letter=' ')],
-                        [Slot(x=0, y=1, letter=' '), Slot(x=1, y=1, letter=' '), Slot(x=2, y=1, letter=' ')],
-                        [Slot(x=0, y=0, letter=' '), Slot(x=0, y=1, letter=' '), Slot(x=0, y=2, letter=' ')],
-                        [Slot(x=2, y=0, letter=' '), Slot(x=2, y=1, letter=' '), Slot(x=2, y=2, letter=' ')],
-                        [Slot(x=0, y=1, letter=' '), Slot(x=1, y=2, letter=' ')],
-                        [Slot(x=1, y=0, letter=' '), Slot(x=1, y=1, letter=' '), Slot(x=1, y=2, letter=' ')],
-                        [Slot(x=2, y=0, letter=' ')],
-                        [Slot(x=0, y=2, letter=' '), Slot(x=1, y=2, letter=' '), Slot(x=2, y=2, letter=' ')],
-                        [Slot(x=1, y=0, letter=' '), Slot(x=2, y=1, letter=' ')]
-                    ]
-                elif mock_shuffle.call_count == 1:
-                    return [
-                        [Slot(x=0, y=0, letter=' '), Slot(x=0, y=1, letter=' '), Slot(x=0, y=2, letter=' ')],
-                        [Slot(x=0, y=0, letter=' '), Slot(x=1, y=1, letter=' '), Slot(x=2, y=2, letter=' ')],
-                        [Slot(x=2, y=0, letter=' ')],
-                        [Slot(x=0, y=1, letter=' '), Slot(x=1, y=1, letter=' '), Slot(x=2, y=1, letter=' ')],
-                        [Slot(x=1, y=0, letter=' '), Slot(x=2, y=1, letter=' ')],
-                        [Slot(x=2, y=0, letter=' '), Slot(x=2, y=1, letter=' '), Slot(x=2, y=2, letter=' ')],
-                        [Slot(x=0, y=2, letter=' '), Slot(x=1, y=2, letter=' '), Slot(x=2, y=2, letter=' ')],
-                        [Slot(x=0, y=0, letter=' '), Slot(x=1, y=0, letter=' '), Slot(x=2, y=0, letter=' ')],
-                        [Slot(x=1, y=0, letter=' '), Slot(x=1, y=1, letter=' '), Slot(x=1, y=2, letter=' ')],
-                        [Slot(x=0, y=1, letter=' '), Slot(x=1, y=2, letter=' ')]
-                    ]
-                mock_shuffle.call_count += 1
-            elif isinstance(val, list) and all(isinstance(v, Slot) for v in val):
-                return [
-                    Slot(x=1, y=1, letter=' '), Slot(x=2, y=0, letter=' '), Slot(x=2, y=2, letter=' '),
-                    Slot(x=1, y=2, letter=' '), Slot(x=1, y=0, letter=' '), Slot(x=2, y=1, letter=' ')
-                ]
-
-            mock_shuffle.call_count = 0
-
-        with mock.patch.object(random, 'shuffle', mock_shuffle):
-            puzzle = WordFinder(words='LOW\nBEFORE\nCRY', size=3)
-            puzzle.full_clean(exclude=('puzzle_type',))
-            puzzle.save()
+        puzzle = WordFinder(words='LOW\nBEFORE\nCRY', size=3)
+        # clean() generates a board too
+        puzzle.rng = random.Random(0)
+        puzzle.full_clean(exclude=('puzzle_type',))
+        self.assertTrue(puzzle.board.is_valid(puzzle.hints.splitlines(), puzzle.solution))
+        puzzle.generate_board(random.Random(0))
+        puzzle.save()
 
         self.assertEqual(puzzle.solution, 'BEFORE')
         self.assertEqual(puzzle.hints, 'CRY')
+        self.assertTrue(puzzle.board.is_valid(['CRY'], 'BEFORE'))
         self.assertIsNotNone(puzzle.image)
 
 
 class TestWordSquare(TestCase):
 
-    @mock.patch.object(random, 'choice')
-    @mock.patch.object(random, 'randint')
-    def test_generate(self, mock_int, mock_choice):
-        mock_int.side_effect = [0, 2, 0, 1, 0, 0, 0, 0]
-        mock_choice.side_effect = [
-            WordSquareSlot(0, 0),
-            WordSquareSlot(1, 1),
-            WordSquareSlot(2, 2),
-            WordSquareSlot(3, 3)
-        ]
+    def test_generate(self):
         WordFactory(word='ABAC')
         WordFactory(word='LOBE')
         WordFactory(word='PREP')
@@ -132,65 +211,44 @@ class TestWordSquare(TestCase):
         WordFactory(word='ABED')
         WordFactory(word='CEPE')
 
-        def mock_order(instance, *args):
-            if instance.query.is_sliced:
-                raise TypeError("Cannot reorder a query once a slice has been taken.")
-            obj = instance._chain()
-            obj.query.clear_ordering(force=True, clear_default=False)
-            obj.query.add_ordering('word')
-            return obj
-
-        with mock.patch('django.db.models.query.QuerySet.order_by', mock_order):
-            puzzle = WordSquare(size=4)
-            puzzle.save()
+        puzzle = WordSquare(size=4)
+        puzzle.generate(random.Random(1))
+        puzzle.save()
 
         self.assertEqual(
             puzzle.board.serialize(),
             [
-                [" ", "B", "A", "C"], ["L", " ", "B", "E"], ["P", "R", " ", "P"], ["S", "A", "D", " "]
+                [" ", "L", "P", " "], ["B", "O", "R", "A"], ["A", "B", "E", "D"], [" ", "E", "P", " "]
             ]
         )
         self.assertEqual(
             puzzle.solution.serialize(),
             [
 
-                ["A", "B", "A", "C"], ["L", "O", "B", "E"], ["P", "R", "E", "P"], ["S", "A", "D", "E"]
+                ["A", "L", "P", "S"], ["B", "O", "R", "A"], ["A", "B", "E", "D"], ["C", "E", "P", "E"]
             ]
         )
         self.assertIsNotNone(puzzle.image)
         self.assertIsNotNone(puzzle.solution_image)
+        self.assertGreater(puzzle.solver_stats.nodes, 0)
 
-    @mock.patch.object(random, 'randint')
-    def test_generate_with_error(self, mock_int):
-        mock_int.side_effect = [3]
+    def test_generate_with_error(self):
         WordFactory(word='ABAC')
         WordFactory(word='LOBE')
         WordFactory(word='PREP')
-        WordFactory(word='SADE')
         WordFactory(word='ALPS')
         WordFactory(word='BORA')
         WordFactory(word='ABED')
         WordFactory(word='CEPE')
 
-        def mock_order(instance, *args):
-            if instance.query.is_sliced:
-                raise TypeError("Cannot reorder a query once a slice has been taken.")
-            obj = instance._chain()
-            obj.query.clear_ordering(force=True, clear_default=False)
-            obj.query.add_ordering('word')
-            return obj
-
-        with mock.patch('django.db.models.query.QuerySet.order_by', mock_order):
-            with self.assertRaises(WordSquareCreateError):
-                puzzle = WordSquare(size=4)
-                puzzle.save()
+        with self.assertRaises(WordSquareCreateError):
+            puzzle = WordSquare(size=4)
+            puzzle.save()
 
 
 class TestWordLadder(TestCase):
 
-    @mock.patch.object(random, 'choice')
-    def test_generate(self, mock_choice):
-        mock_choice.return_value = 'POOL'
+    def test_generate(self):
         WordFactory(word='POOL')
         WordFactory(word='COOL')
         WordFactory(word='COOK')
@@ -199,17 +257,9 @@ class TestWordLadder(TestCase):
         WordFactory(word='BOAT')
         WordFactory(word='BRAT')
 
-        def mock_order(instance, *args):
-            if instance.query.is_sliced:
-                raise TypeError("Cannot reorder a query once a slice has been taken.")
-            obj = instance._chain()
-            obj.query.clear_ordering(force=True, clear_default=False)
-            obj.query.add_ordering('word')
-            return obj
-
-        with mock.patch('django.db.models.query.QuerySet.order_by', mock_order):
-            puzzle = WordLadder(width=4)
-            puzzle.save()
+        puzzle = WordLadder(width=4)
+        puzzle.generate(random.Random(5))
+        puzzle.save()
 
         self.assertEqual(
             puzzle.board.serialize(),
@@ -227,20 +277,10 @@ class TestWordLadder(TestCase):
         self.assertIsNotNone(puzzle.image)
         self.assertIsNotNone(puzzle.solution_image)
 
-    @mock.patch.object(random, 'choice')
-    def test_generate_with_error(self, mock_choice):
-        mock_choice.return_value = 'POOL'
+    def test_generate_with_error(self):
         WordFactory(word='POOL')
+        WordFactory(word='COOL')
 
-        def mock_order(instance, *args):
-            if instance.query.is_sliced:
-                raise TypeError("Cannot reorder a query once a slice has been taken.")
-            obj = instance._chain()
-            obj.query.clear_ordering(force=True, clear_default=False)
-            obj.query.add_ordering('word')
-            return obj
-
-        with mock.patch('django.db.models.query.QuerySet.order_by', mock_order):
-            with self.assertRaises(WordLadderCreateError):
-                puzzle = WordLadder(width=4)
-                puzzle.save()
+        with self.assertRaises(WordLadderCreateError):
+            puzzle = WordLadder(width=4)
+            puzzle.save()
@@ -0,0 +1,386 @@
+import os
+import random
+import tempfile
+from unittest import mock
+
+from django.db import connection
+from django.test import override_settings
+from django.test.testcases import TestCase
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from puzzle.common.fields import decode_board, decode_compact, encode_compact
+from puzzle.common.index import get_word_index, WordIndex
+from puzzle.common.snapshot import expire_snapshot, MappedWordIndex, write_snapshot, WordSnapshot
+from puzzle.common.utils import import_words, insert_words
+from puzzle.knight_move.exceptions import SlotNotAvailableError, SlotOutOfRangeError
+from puzzle.knight_move.fields import Board as KnightMoveBoard
+from puzzle.knight_move.paths import PathTable
+from puzzle.rendering import draw_grid, get_glyph, get_grid
+from puzzle.word_finder.exceptions import WordFinderCreateError
+from puzzle.word_finder.fields import Board as WordFinderBoard
+from puzzle.word_finder.models import CreateWordFinderRequest
+from puzzle.word_finder.placement import get_placements, Grid
+from puzzle.word_finder.search import PatternMatcher
+from puzzle.word_finder.utils import generate_word_finder
+from puzzle.word_ladder.exceptions import WordLadderCreateError
+from puzzle.word_ladder.graph import WordGraph
+from puzzle.word_ladder.utils import generate_word_ladder
+from puzzle.word_square.exceptions import WordSquareCreateError
+from puzzle.word_square.fields import Board as WordSquareBoard
+from puzzle.word_square.models import SeriesType, Slot as WordSquareSlot
+from puzzle.word_square.solver import WordSquareSolver
+
+from tests.puzzle.factories import WordFactory
+
+
+class TestCompactBoard(TestCase):
+
+    def test_encode(self):
+        rows = [['*', None, 'A'], [' ', 'B', 'C']]
+        self.assertEqual(encode_compact(rows), '3x2:*.A_BC')
+        self.assertEqual(decode_compact('3x2:*.A_BC'), rows)
+        self.assertEqual(decode_board('3x2:*.A_BC'), rows)
+        self.assertEqual(decode_board('[["*", null, "A"], [" ", "B", "C"]]'), rows)
+        self.assertEqual(decode_compact(encode_compact([])), [])
+
+    def test_encode_invalid(self):
+        with self.assertRaises(ValueError):
+            encode_compact([['A', 'B'], ['C']])
+        with self.assertRaises(ValueError):
+            encode_compact([['_']])
+        with self.assertRaises(ValueError):
+            encode_compact([['AB']])
+
+
+class TestWordIndex(TestCase):
+
+    def test_get_words(self):
+        index = WordIndex(4, ['ABAC', 'ABED', 'ALPS', 'BORA'])
+        self.assertEqual(index.get_words('A   '), ['ABAC', 'ABED', 'ALPS'])
+        self.assertEqual(index.get_words('AB  '), ['ABAC', 'ABED'])
+        self.assertEqual(index.get_words(' O A'), ['BORA'])
+        self.assertEqual(index.get_words('Z   '), [])
+        self.assertEqual(index.get_words('    '), ['ABAC', 'ABED', 'ALPS', 'BORA'])
+        self.assertTrue(index.has_words('A  S'))
+        self.assertFalse(index.has_words('B  S'))
+
+    def test_get_word_index(self):
+        WordFactory(word='POOL')
+        WordFactory(word='COOL')
+        WordFactory(word='BRAT')
+        WordFactory(word='BOATS')
+        with self.assertNumQueries(1):
+            index = get_word_index(4)
+            self.assertEqual(index.get_words('  O '), ['COOL', 'POOL'])
+            self.assertIs(get_word_index(4), index)
+
+        import_words(['COOK'])
+        self.assertEqual(get_word_index(4).get_words('  O '), ['COOK', 'COOL', 'POOL'])
+
+    def test_import_words(self):
+        WordFactory(word='POOL')
+        progress = []
+        num_imported = import_words(
+            [' cool ', 'POOL', 'cool', 'boo', 'brats', 'book'],
+            batch_size=2,
+            progress=lambda num_lines, num_written: progress.append((num_lines, num_written))
+        )
+        self.assertEqual(num_imported, 3)
+        # POOL was there, and COOL is repeated across batches
+        self.assertEqual(progress, [(2, 1), (5, 2), (6, 3)])
+        self.assertEqual(get_word_index(4).words, ['BOOK', 'COOL', 'POOL'])
+
+    def test_insert_words(self):
+        WordFactory(word='POOL')
+        WordFactory(word='BOATS')
+        # The dictionary is never counted, only the batch looked up
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(insert_words(['COOL', 'POOL']), 1)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+        self.assertEqual(insert_words(['COOL', 'POOL']), 0)
+        self.assertEqual(get_word_index(4).words, ['COOL', 'POOL'])
+
+
+class TestWordSnapshot(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'words.snapshot')
+        write_snapshot(self.path, {
+            4: ['POOL', 'COOL', 'BRAT', 'ÉTÉS'],
+            5: ['BOATS']
+        })
+
+    def test_index(self):
+        snapshot = WordSnapshot(self.path)
+        index = snapshot.index(4)
+        expected = WordIndex(4, ['BRAT', 'COOL', 'POOL', 'ÉTÉS'])
+        self.assertIsInstance(index, MappedWordIndex)
+        self.assertEqual(len(index), 4)
+        self.assertEqual(list(index.words), expected.words)
+        self.assertEqual(index.words[-1], 'ÉTÉS')
+        self.assertEqual(index.words[1:3], ['COOL', 'POOL'])
+        self.assertEqual(dict(index.masks), expected.masks)
+        self.assertEqual(index.get_words('  O '), ['COOL', 'POOL'])
+        self.assertEqual(index.get_words('É   '), ['ÉTÉS'])
+        self.assertEqual(list(snapshot.index(5).words), ['BOATS'])
+        self.assertEqual(snapshot.index(6).words, [])
+
+    def test_get_word_index(self):
+        WordFactory(word='BOOK')
+        with override_settings(PUZZLE_WORD_SNAPSHOT=self.path), self.assertNumQueries(0):
+            index = get_word_index(4)
+            self.assertEqual(index.get_words('  O '), ['COOL', 'POOL'])
+            self.assertIs(get_word_index(4), index)
+
+            write_snapshot(self.path, {4: ['BOOK']})
+            # The rebuild is picked up from the next request on
+            self.assertIs(get_word_index(4), index)
+            expire_snapshot()
+            self.assertEqual(list(get_word_index(4).words), ['BOOK'])
+
+
+class TestRendering(TestCase):
+
+    def test_draw_grid(self):
+        image = Image.open(draw_grid([['A', ' '], ['*', 'B']], 2, 2))
+        self.assertEqual(image.size, (201, 201))
+        self.assertEqual(image.getpixel((100, 50)), 128)
+        self.assertEqual(image.getpixel((150, 50)), 255)
+        self.assertLess(min(image.crop((0, 0, 100, 100)).getdata()), 128)
+        self.assertLess(min(image.crop((0, 100, 100, 200)).getdata()), 128)
+
+    def test_caching(self):
+        self.assertIs(get_grid(3, 3), get_grid(3, 3))
+        self.assertIs(get_glyph('A'), get_glyph('A'))
+        self.assertIsNone(get_glyph(' '))
+
+
+class TestBoardSeries(TestCase):
+
+    def test_word_square(self):
+        board = WordSquareBoard.deserialize([['A', 'L'], ['B', ' ']])
+        self.assertIs(board.series, board.series)
+        related = board.related_series(WordSquareSlot(1, 1))
+        self.assertEqual([series.series_type for series in related], [SeriesType.ROW, SeriesType.COLUMN])
+        board[(1, 1)] = 'O'
+        self.assertEqual([''.join(slot.letter for slot in series) for series in related], ['BO', 'LO'])
+
+    def test_word_finder(self):
+        board = WordFinderBoard(3)
+        self.assertEqual(len(board.series), 3 + 3 + 2 * 4)
+        board[(0, 2)] = 'A'
+        board[(1, 1)] = 'B'
+        self.assertEqual(board.words(['AB']), [[(0, 2), (1, 1)]])
+
+
+class TestWordSquareSolver(TestCase):
+
+    words = ['ABAC', 'ABED', 'ALPS', 'BORA', 'CEPE', 'LOBE', 'PREP', 'SADE']
+
+    def test_solve(self):
+        solver = WordSquareSolver(WordIndex(4, self.words), 4)
+        square = solver.solve()
+        rows = [''.join(row) for row in square]
+        columns = [''.join(column) for column in zip(*square)]
+        self.assertTrue(all(word in self.words for word in rows + columns))
+        self.assertGreaterEqual(solver.stats.nodes, 1)
+        self.assertLessEqual(solver.stats.backtracks, solver.stats.nodes)
+
+    def test_solve_seeded(self):
+        index = WordIndex(4, self.words)
+        squares = [WordSquareSolver(index, 4, rng=random.Random(3)).solve() for _ in range(2)]
+        self.assertEqual(squares[0], squares[1])
+
+    def test_solve_snapshot(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'words.snapshot')
+        write_snapshot(path, {4: self.words})
+        square = WordSquareSolver(WordSnapshot(path).index(4), 4).solve()
+        self.assertTrue(all(''.join(row) in self.words for row in square))
+
+    def test_solve_without_solution(self):
+        solver = WordSquareSolver(WordIndex(4, self.words[:-1]), 4)
+        with self.assertRaises(WordSquareCreateError):
+            solver.solve()
+
+    def test_solve_max_nodes(self):
+        solver = WordSquareSolver(WordIndex(4, self.words), 4, max_nodes=0)
+        with self.assertRaises(WordSquareCreateError):
+            solver.solve()
+
+
+class TestKnightMoveBoard(TestCase):
+
+    rows = [['R', 'S', 'P'], ['A', '*', 'O'], ['W', 'D', None]]
+
+    def test_grid(self):
+        board = KnightMoveBoard.deserialize(self.rows)
+        self.assertEqual(board.serialize(), self.rows)
+        self.assertEqual(board[(2, 1)].letter, 'D')
+        self.assertEqual([slot.letter for slot in board.get_moves(0, 0, should_be_empty=False)], ['O', 'D'])
+        self.assertEqual(board.get_moves(0, 1), [board[(2, 2)]])
+        with self.assertRaises(SlotOutOfRangeError):
+            board[(3, 0)]
+        with self.assertRaises(SlotNotAvailableError):
+            board[(0, 0)] = 'X'
+
+        self.assertFalse(board.is_full)
+        board[(2, 2)] = 'S'
+        self.assertTrue(board.is_full)
+        self.assertTrue(board.is_valid('PASSWORD'))
+
+
+class TestPathTable(TestCase):
+
+    def test_paths(self):
+        table = PathTable(3, 3, frozenset([(1, 1)]))
+        self.assertTrue(table.complete)
+        self.assertEqual(len(table.paths), 16)
+        self.assertTrue(all(len(set(path)) == 8 for path in table.paths))
+
+        path = table.paths[0]
+        letters = dict(zip(path, 'PASSWORD'))
+        self.assertEqual(table.find_path(letters, 'PASSWORD'), path)
+        self.assertEqual(table.find_path(letters, 'DROWSSAP'), tuple(reversed(path)))
+        self.assertIsNone(table.find_path(letters, 'PASSWODR'))
+        self.assertIsNone(table.find_path(letters, 'PASS'))
+
+    def test_paths_without_solution(self):
+        table = PathTable(4, 4)
+        self.assertTrue(table.complete)
+        self.assertEqual(table.paths, [])
+        self.assertIsNone(table.random_path(random.Random(0)))
+
+    def test_paths_cut_short(self):
+        table = PathTable(5, 5, max_steps=5000)
+        self.assertFalse(table.complete)
+        path = table.random_path(random.Random(0))
+        word = 'ABCDEFGHIJKLMNOPQRSTUVWXY'
+        letters = dict(zip(path, word))
+        self.assertEqual(table.find_path(letters, word), path)
+
+    def test_search_repeated_letters(self):
+        table = PathTable(5, 5, max_steps=1)
+        self.assertEqual(table.paths, [])
+        letters = {cell: 'A' for cell in table.cells}
+        self.assertIsNone(table.find_path(letters, 'A' * 24 + 'B'))
+        path = table.find_path(letters, 'A' * 25)
+        self.assertEqual(len(set(path)), 25)
+        self.assertTrue(all(b in table.neighbours[a] for a, b in zip(path, path[1:])))
+
+
+class TestWordFinderPlacement(TestCase):
+
+    def test_placements(self):
+        self.assertEqual(len(get_placements(3, 3)), 16)
+        self.assertEqual(len(get_placements(3, 2)), 2 * (6 * 2 + 4 * 2))
+        self.assertEqual(len(get_placements(3, 4)), 0)
+
+    def test_place(self):
+        grid = Grid(5)
+        rng = random.Random(0)
+        for word in ('CAT', 'TOE', 'ACE'):
+            self.assertTrue(grid.place(word, rng))
+        self.assertFalse(grid.place('XYZWVU', rng))
+        board = WordFinderBoard.deserialize(grid.rows())
+        for word, cells in zip(('CAT', 'TOE', 'ACE'), board.words(['CAT', 'TOE', 'ACE'])):
+            self.assertEqual(''.join(board[cell] for cell in cells), word)
+
+        grid.fill('X' * grid.num_open, rng)
+        self.assertEqual(grid.num_open, 0)
+
+    def test_place_unique(self):
+        grid = Grid(3)
+        rng = random.Random(0)
+        self.assertTrue(grid.place('ABA', rng))
+        # Would spell ABA a second time
+        self.assertFalse(grid.place('ABABA', rng))
+        self.assertFalse(grid.place('ABA', rng))
+
+    def test_generate_valid(self):
+        words = [
+            'ABBA', 'BABE', 'ABBE', 'EBB', 'ABBESS', 'BASS', 'SASSES', 'ASSESS', 'ESSE', 'SEAS', 'BEES',
+            'ABASE', 'ABASES', 'BASES', 'BABES', 'SEES', 'EASE', 'EASES', 'ABBESSES'
+        ]
+        generated = 0
+        for seed in range(50):
+            try:
+                response = generate_word_finder(CreateWordFinderRequest(words=words, size=6), random.Random(seed))
+            except WordFinderCreateError:
+                continue
+            generated += 1
+            board = WordFinderBoard.deserialize(response.words)
+            self.assertTrue(board.is_valid(response.hints, response.solution))
+        self.assertGreater(generated, 0)
+
+    def test_words_reversed(self):
+        board = WordFinderBoard.deserialize([['C', 'B', 'A'], ['X', 'E', 'X'], ['F', 'X', 'X']])
+        self.assertEqual(board.words(['ABC', 'AEF']), [[(0, 2), (0, 1), (0, 0)], [(0, 2), (1, 1), (2, 0)]])
+
+
+class TestWordFinderSearch(TestCase):
+
+    rows = [['C', 'A', 'T'], ['O', 'W', 'E'], ['W', 'O', 'N']]
+
+    def test_pattern_matcher(self):
+        matcher = PatternMatcher(['HE', 'SHE', 'HERS', 'HIS', ''])
+        self.assertEqual(list(matcher.search('USHERS')), [(1, 'SHE'), (2, 'HE'), (2, 'HERS')])
+        self.assertEqual(list(matcher.search('XYZ')), [])
+
+    def test_locate(self):
+        board = WordFinderBoard.deserialize(self.rows)
+        self.assertEqual(board.locate(['CAT', 'NOW', 'XYZ', 'COW', 'TWW']), {
+            'CAT': [(0, 0), (0, 1), (0, 2)],
+            'NOW': [(2, 2), (2, 1), (2, 0)],
+            'COW': [(0, 0), (1, 0), (2, 0)],
+            'TWW': [(0, 2), (1, 1), (2, 0)],
+        })
+        # A missing hint no longer hides the ones after it
+        self.assertEqual(board.words(['XYZ', 'CAT']), [[(0, 0), (0, 1), (0, 2)]])
+
+    def test_is_valid(self):
+        board = WordFinderBoard.deserialize(self.rows)
+        self.assertTrue(board.is_valid(['CAT', 'NOW'], 'EOW'))
+        self.assertEqual(board.serialize(), self.rows)
+        self.assertFalse(board.is_valid(['CAT', 'NOW'], 'EOX'))
+        self.assertFalse(board.is_valid(['CAT', 'XYZ'], 'OWEWON'))
+
+
+class TestWordGraph(TestCase):
+
+    words = ['BOAT', 'BOOK', 'BOOT', 'BRAT', 'COOK', 'COOL', 'POOL']
+
+    def test_neighbours(self):
+        graph = WordGraph(WordIndex(4, self.words))
+        self.assertEqual(
+            sorted(graph.words[node] for node in graph.neighbours[graph.nodes['BOOK']]),
+            ['BOOT', 'COOK']
+        )
+        self.assertEqual(graph.neighbours[graph.nodes['BRAT']], [graph.nodes['BOAT']])
+
+    def test_ladder(self):
+        graph = WordGraph(WordIndex(4, self.words))
+        self.assertEqual(
+            graph.ladder('POOL', 10),
+            ['POOL', 'COOL', 'COOK', 'BOOK', 'BOOT', 'BOAT', 'BRAT']
+        )
+        self.assertIsNone(graph.ladder('POOL', 6))
+        self.assertIsNone(graph.ladder('BOAT', 10))
+
+    def test_generate_max_starts(self):
+        for word in self.words + ['ZZZZ']:
+            WordFactory(word=word)
+        with mock.patch.object(WordGraph, 'ladder', return_value=None) as mock_ladder:
+            with self.assertRaises(WordLadderCreateError):
+                generate_word_ladder(4, random.Random(0), max_starts=3)
+        self.assertEqual(mock_ladder.call_count, 3)
+        # ZZZZ has no neighbours and is never tried
+        with mock.patch.object(WordGraph, 'ladder', return_value=None) as mock_ladder:
+            with self.assertRaises(WordLadderCreateError):
+                generate_word_ladder(4, random.Random(0))
+        self.assertEqual(mock_ladder.call_count, len(self.words))
@@ -179,7 +179,11 @@ class TestImportWordsView(TestCase):
         self.assertEqual(response.status_code, 302)
         words = Word.objects.all()
         self.assertEqual(len(words), 4)
-        self.assertTrue(all(word.tokens.count() == 4 for word in words))
+        self.assertTrue(all(word.letter_3 and not word.letter_4 for word in words))
+        self.assertEqual(
+            list(Word.objects.get_for_tokens({1: 'A', 3: 'E'}).values_list('word', flat=True)),
+            ['SADE']
+        )
 
     def test_post_invalid(self):
         self.client.login(username='admin', password='welkom')